@@ -1,89 +1,196 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from st_aggrid import AgGrid, GridOptionsBuilder
-from io import BytesIO
-import matplotlib.pyplot as plt
+from st_aggrid import AgGrid
+from calciatori.boards import BOARDS
+from calciatori.charts import (
+    pairing_heatmap_figure,
+    pairing_heatmap_png,
+    progression_figure,
+    scoreboard_png,
+)
+from calciatori.data import (
+    DATA_FILE,
+    MATCH_ENTRY,
+    add_match,
+    export_data,
+    entered_matches,
+    invalidate_cache,
+    load_dataset,
+    load_upload,
+    match_index,
+    player_pairings,
+    player_stats,
+    progression,
+    progression_players,
+    remove_match,
+    season_files,
+    top_boards,
+)
+from calciatori.export import EXPORT_FORMATS
+from calciatori.grids import grid_options_for
+from calciatori.seasons import ALL_TIME, CURRENT_SEASON
+from calciatori.snapshot import WorkbookError
+from calciatori.store import memory_report
  
 # Page config
 st.set_page_config(page_title="Calciatori di Reading", layout="wide")
 st.title("CALCIATORI DI READING")
-st.caption("Data collected since 13 November 2025")
 
-# File upload
-uploaded_file = "CALCIATORI_RDG.xlsx"
+# File upload: an uploaded workbook replaces the built-in data for this
+# session. It is parsed from memory and cached by content hash.
+upload = st.sidebar.file_uploader("Upload data", type=["xlsx"], help="An .xlsx with the same sheets as the built-in file")
+uploaded_file = upload if upload is not None else DATA_FILE
+
+# One workbook per season (see calciatori.seasons); only the season being
+# viewed is loaded, and "All time" stacks the per-season caches.
+season = CURRENT_SEASON
+if upload is None:
+    season_options = list(season_files(DATA_FILE))[::-1]
+    if len(season_options) > 1:
+        season = st.sidebar.selectbox("Season", season_options + [ALL_TIME], key="season")
+
+# The workbook is cached and only re-parsed when the file changes; this
+# forces a reload anyway (e.g. after replacing the file in place).
+if st.sidebar.button("Reload data"):
+    invalidate_cache()
+
+
+@st.fragment
+def matches_section(workbook):
+    """Scoreboard and lineups of any Giornata (latest by default), plus the
+    paginated match history."""
+    # Match ID -> lineup rows, built once per data version: picking a past
+    # Giornata is a lookup, not a scan of the whole Lineups sheet.
+    matches = match_index(workbook)
+    giornate = matches.dates()
+    match_id = st.selectbox(
+        "Giornata",
+        giornate.index.tolist(),
+        format_func=lambda m: f"{m}° Giornata ({giornate[m]:%d %B %Y})",
+        key="scoreboard_match",
+    )
+    match_df = matches.lineup(match_id)
 
-if uploaded_file:
-    # Load sheets
-    players_df = pd.read_excel(uploaded_file, sheet_name="Players", engine="openpyxl")
-    matches_df = pd.read_excel(uploaded_file, sheet_name="Matches", engine="openpyxl")
-    lineups_df = pd.read_excel(uploaded_file, sheet_name="Team Lineups", engine="openpyxl")
-
-
-
-    # Latest match scoreboard with dynamic layout
-    latest_match_id = lineups_df.sort_values(by="Date", ascending=False)["Match ID"].iloc[0]
-    latest_match_df = lineups_df[lineups_df["Match ID"] == latest_match_id]
-    
-    # Extract scores
-    team_a_score = latest_match_df[latest_match_df["Team (A/B)"] == "A"]["Team Score"].iloc[0]
-    team_b_score = latest_match_df[latest_match_df["Team (A/B)"] == "B"]["Team Score"].iloc[0]
-    
-    # Team labels
-    team_a_label = "Home"
-    team_b_label = "Away"
-    
-    # Goal scorers
-    team_a_scorers = latest_match_df[(latest_match_df["Team (A/B)"] == "A") & (latest_match_df["Goals Scored"] > 0)]
-    team_b_scorers = latest_match_df[(latest_match_df["Team (A/B)"] == "B") & (latest_match_df["Goals Scored"] > 0)]
-    
-    # Dynamic figure height based on max scorers
-    max_scorers = max(len(team_a_scorers), len(team_b_scorers))
-    fig_height = 2 + (max_scorers*0.3)  # Add space per scorer
-    
-    fig, ax = plt.subplots(figsize=(6, fig_height))
-    ax.axis('off')
-    
-    # Title
-    match_date = latest_match_df['Date'].iloc[0].strftime("%d %B %Y")
-    ax.set_title(f"{latest_match_id}° Giornata  ({match_date})", fontsize=12, fontweight='bold', ha='center')
-    
-    # Display teams and scores
-    ax.text(0.25, 0.9, team_a_label, fontsize=12, ha='center')
-    ax.text(0.75, 0.9, team_b_label, fontsize=12, ha='center')
-    ax.text(0.25, 0.7, str(team_a_score), fontsize=24, ha='center', fontweight='bold', color='blue')
-    ax.text(0.75, 0.7, str(team_b_score), fontsize=24, ha='center', fontweight='bold', color='red')
-    
-    # Separator
-    ax.text(0.5, 0.7, "VS", fontsize=12, ha='center')
-    
-    # Dynamic spacing for scorers
-    start_y = 0.65
-    line_height = 0.08
-    
-    # Team A scorers
-    if not team_a_scorers.empty:
-        for i, (_, row) in enumerate(team_a_scorers.iterrows()):
-            ax.text(0.25, start_y - (i+1) * line_height, f"{row['Player Name']} ({int(row['Goals Scored'])})", fontsize=10, ha='center')
-    else:
-        ax.text(0.25, start_y - line_height, "-", fontsize=10, ha='center')
-    
-    # Team B scorers
-    if not team_b_scorers.empty:
-        for i, (_, row) in enumerate(team_b_scorers.iterrows()):
-            ax.text(0.75, start_y - (i+1) * line_height, f"{row['Player Name']} ({int(row['Goals Scored'])})", fontsize=10, ha='center')
-    else:
-        ax.text(0.75, start_y - line_height, "-", fontsize=10, ha='center')
-    
-    st.pyplot(fig)
+    # Drawn once per (data version, match) and served as cached PNG bytes.
+    st.image(
+        scoreboard_png(workbook.version, match_id, match_df),
+        width="stretch",
+    )
+
+    lineup_columns = ["Player Name", "Goals Scored", "Assists", "Own Goals"]
+    for col, side, label in zip(st.columns(2), ("A", "B"), ("Home", "Away")):
+        with col:
+            st.markdown(f"**{label}**")
+            st.dataframe(
+                match_df.loc[match_df["Team (A/B)"] == side, lineup_columns],
+                hide_index=True,
+                width="stretch",
+            )
 
-   
+    st.subheader("Match History")
+    per_page = 20
+    n_pages = matches.n_pages(per_page)
+    page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, key="match_history_page")
+    st.caption(f"{len(matches)} matches, most recent first (page {page} of {n_pages})")
+    st.dataframe(
+        matches.page(page - 1, per_page),
+        hide_index=True,
+        width="stretch",
+        column_config={"Date": st.column_config.DateColumn("Date", format="DD/MM/YYYY")},
+    )
 
+    # New matches are appended to the current season's data file only, and
+    # only where the deployment enables it (CALCIATORI_MATCH_ENTRY=1).
+    if MATCH_ENTRY and upload is None and season == CURRENT_SEASON:
+        add_match_form(workbook)
+        remove_match_form(workbook)
+
+
+def add_match_form(workbook):
+    """Enter a new match. It is appended to the entries log next to the data
+    file (see calciatori.entries); the Excel file is not rewritten, and only
+    the new match is aggregated on the next run."""
+    with st.expander("Add a match"):
+        with st.form("add_match", clear_on_submit=True):
+            next_id = int(workbook.matches["Match ID"].max()) + 1 if len(workbook.matches) else 1
+            col_id, col_date, col_a, col_b = st.columns(4)
+            match_id = col_id.number_input("Match ID", min_value=1, value=next_id, step=1)
+            day = col_date.date_input("Date")
+            score_a = col_a.number_input("Goals Team A", min_value=0, step=1)
+            score_b = col_b.number_input("Goals Team B", min_value=0, step=1)
+            lineup = st.data_editor(
+                pd.DataFrame({
+                    "Player Name": pd.Series(dtype=str),
+                    "Team (A/B)": pd.Series(dtype=str),
+                    "Goals Scored": pd.Series(dtype=int),
+                    "Assists": pd.Series(dtype=int),
+                    "Own Goals": pd.Series(dtype=int),
+                }),
+                num_rows="dynamic",
+                hide_index=True,
+                width="stretch",
+                column_config={
+                    "Team (A/B)": st.column_config.SelectboxColumn(options=["A", "B"], required=True),
+                    "Goals Scored": st.column_config.NumberColumn(min_value=0, default=0),
+                    "Assists": st.column_config.NumberColumn(min_value=0, default=0),
+                    "Own Goals": st.column_config.NumberColumn(min_value=0, default=0),
+                },
+            )
+            mvp = st.text_input("MVP")
+            if st.form_submit_button("Add match"):
+                lineup = lineup.dropna(subset=["Player Name"]).fillna(0)
+                entry = {
+                    "match_id": int(match_id),
+                    "date": day.isoformat(),
+                    "score_a": int(score_a),
+                    "score_b": int(score_b),
+                    "mvp": mvp.strip(),
+                    "players": [
+                        {"name": row["Player Name"], "team": row["Team (A/B)"],
+                         "goals": int(row["Goals Scored"]), "assists": int(row["Assists"]),
+                         "own_goals": int(row["Own Goals"])}
+                        for _, row in lineup.iterrows()
+                    ],
+                }
+                try:
+                    add_match(workbook, entry)
+                except ValueError as exc:
+                    st.error(f"Match not added: {exc}")
+                else:
+                    st.rerun(scope="app")
+
+
+def remove_match_form(workbook):
+    """Remove a match entered by mistake. Only matches entered in the app can
+    be removed; the ones in the Excel file are edited there."""
+    entered = entered_matches(workbook)
+    if not entered:
+        return
+    with st.expander("Remove an entered match"):
+        with st.form("remove_match"):
+            match_id = st.selectbox("Match ID", entered[::-1])
+            if st.form_submit_button("Remove match"):
+                try:
+                    remove_match(workbook, match_id)
+                except ValueError as exc:
+                    st.error(f"Match not removed: {exc}")
+                else:
+                    st.rerun(scope="app")
+
+
+@st.fragment
+def leaderboards_section(workbook):
+    """General Leaderboard and the top-5 boards."""
+    # Per-player stats are derived from the lineups rather than read from the
+    # spreadsheet's formula-driven "Players" sheet (which is only the roster).
+    players_df = player_stats(workbook)
 
-    
     # Filter players with at least 1 match
     st.subheader("General Leaderboard")
-    st.caption("Sorted by Games Won, Games Drew, MVP, and Goal Scored. Only players with one or more game played since 13-11-2025 are visible")
+    st.caption(
+        "Sorted by Games Won, Games Drew, MVP, and Goal Scored. Only players with one or more game "
+        f"played since {match_index(workbook).dates().min():%d %B %Y} are visible"
+    )
     filtered_players_df = players_df[players_df["Match Played"] > 0]
     columns_to_display = ["Player Name", "Match Played", "Games Won", "Games Drew", "Games Lost", "% Win", "% Lost", "Goal Difference", "Goal Scored", "Assists", "Goal/Game", "MVP", "Own Goals"]
     filtered_players_df = filtered_players_df[columns_to_display]
@@ -106,40 +213,10 @@ if uploaded_file:
 
     styled_df = filtered_players_df.style.apply(lambda _: apply_highlight(filtered_players_df), axis=None)
 
-    
-    
-    # Render searchable and sortable table using AgGrid 
-    # Configure AgGrid
-    gb = GridOptionsBuilder.from_dataframe(filtered_players_df)
-    gb.configure_default_column(editable=False, sortable=True, filter=True)
-    gb.configure_pagination(enabled=True)
-
-    # Force scrollable layout
-    gb.configure_grid_options(domLayout='normal')  # Allows scrolling
-    gb.configure_grid_options(suppressHorizontalScroll=False)
-    
-    # Set minimum column width so they don't shrink
-    for col in filtered_players_df.columns:
-        gb.configure_column(col, minWidth=120)  # Adjust as needed
-
-    
-    # Set minimum column width and alignment
-    for i, col in enumerate(filtered_players_df.columns):
-        if i == 0:
-            # First column: left-aligned
-            gb.configure_column(col, minWidth=150, cellStyle={'textAlign': 'left'})
-        else:
-            # Other columns: center-aligned
-            gb.configure_column(col, minWidth=120, cellStyle={'textAlign': 'center'})
-
+    # Render searchable and sortable table using AgGrid; the options are
+    # built once per column schema and shared with every session.
+    gridOptions = grid_options_for(filtered_players_df, "leaderboard")
 
-    
-    gridOptions = gb.build()
-    
-    # Disable auto-sizing completely
-    gridOptions['suppressAutoSize'] = True
-    gridOptions['suppressSizeToFit'] = True
-    
     # Render AgGrid with fixed height
     AgGrid(
         filtered_players_df,
@@ -149,401 +226,166 @@ if uploaded_file:
         fit_columns_on_grid_load=False  # Prevent auto-fit
     )
 
-
-
-
-# Top 5 players by Match Played
-st.subheader("Veterani")
-st.caption("Top 5 players by number of matches played")
-top_players_df = filtered_players_df.sort_values(by="Match Played", ascending=False).head(5)
-columns_to_display2 = ["Player Name", "Match Played"]
-top_players_df = top_players_df[columns_to_display2]
-
-# Render using AgGrid for consistency
-gb_top = GridOptionsBuilder.from_dataframe(top_players_df)
-gb_top.configure_default_column(editable=False, sortable=True, filter=False)
-gb_top.configure_grid_options(domLayout='normal')
-gb_top.configure_grid_options(suppressHorizontalScroll=False)
-
-# Column alignment
-for i, col in enumerate(top_players_df.columns):
-    if i == 0:
-        gb_top.configure_column(col, minWidth=150, cellStyle={'textAlign': 'left'})
-    else:
-        gb_top.configure_column(col, minWidth=120, cellStyle={'textAlign': 'center'})
-
-gridOptions_top = gb_top.build()
-gridOptions_top['suppressAutoSize'] = True
-gridOptions_top['suppressSizeToFit'] = True
-
-AgGrid(
-    top_players_df,
-    gridOptions=gridOptions_top,
-    enable_enterprise_modules=False,
-    height=180,  # Smaller height for top 5
-    fit_columns_on_grid_load=False
-)
-
-
-# Top 5 players by Goal Scored
-st.subheader("Capocannonieri")
-st.caption("Top 5 players by number of goals scored")
-top_goals_df = filtered_players_df.sort_values(by="Goal Scored", ascending=False).head(5)
-columns_to_display3 = ["Player Name", "Goal Scored", "Goal/Game"]
-top_goals_df = top_goals_df[columns_to_display3]
-
-# Render using AgGrid for consistency
-gb_top = GridOptionsBuilder.from_dataframe(top_goals_df)
-gb_top.configure_default_column(editable=False, sortable=True, filter=False)
-gb_top.configure_grid_options(domLayout='normal')
-gb_top.configure_grid_options(suppressHorizontalScroll=False)
-
-# Column alignment
-for i, col in enumerate(top_goals_df.columns):
-    if i == 0:
-        gb_top.configure_column(col, minWidth=150, cellStyle={'textAlign': 'left'})
-    else:
-        gb_top.configure_column(col, minWidth=120, cellStyle={'textAlign': 'center'})
-
-gridOptions_top = gb_top.build()
-gridOptions_top['suppressAutoSize'] = True
-gridOptions_top['suppressSizeToFit'] = True
-
-AgGrid(
-    top_goals_df,
-    gridOptions=gridOptions_top,
-    enable_enterprise_modules=False,
-    height=180,  # Smaller height for top 5
-    fit_columns_on_grid_load=False
-)
-
-
-
-# Top 5 players by Assist
-st.subheader("Fantasisti")
-st.caption("Top 5 players by number of assists")
-top_assists_df = filtered_players_df.sort_values(by="Assists", ascending=False).head(5)
-columns_to_display4 = ["Player Name", "Assists"]
-top_assists_df = top_assists_df[columns_to_display4]
-
-# Render using AgGrid for consistency
-gb_top = GridOptionsBuilder.from_dataframe(top_assists_df)
-gb_top.configure_default_column(editable=False, sortable=True, filter=False)
-gb_top.configure_grid_options(domLayout='normal')
-gb_top.configure_grid_options(suppressHorizontalScroll=False)
-
-# Column alignment
-for i, col in enumerate(top_assists_df.columns):
-    if i == 0:
-        gb_top.configure_column(col, minWidth=150, cellStyle={'textAlign': 'left'})
-    else:
-        gb_top.configure_column(col, minWidth=120, cellStyle={'textAlign': 'center'})
-
-gridOptions_top = gb_top.build()
-gridOptions_top['suppressAutoSize'] = True
-gridOptions_top['suppressSizeToFit'] = True
-
-AgGrid(
-    top_assists_df,
-    gridOptions=gridOptions_top,
-    enable_enterprise_modules=False,
-    height=180,  # Smaller height for top 5
-    fit_columns_on_grid_load=False
-)
-
-
-
-
-
-# Top 5 players by MVP
-st.subheader("MVP")
-st.caption("Top 5 players by number of MVP awards")
-top_mvp_df = filtered_players_df.sort_values(by="MVP", ascending=False).head(5)
-columns_to_display6 = ["Player Name", "MVP"]
-top_mvp_df = top_mvp_df[columns_to_display6]
-
-# Render using AgGrid for consistency
-gb_top = GridOptionsBuilder.from_dataframe(top_mvp_df)
-gb_top.configure_default_column(editable=False, sortable=True, filter=False)
-gb_top.configure_grid_options(domLayout='normal')
-gb_top.configure_grid_options(suppressHorizontalScroll=False)
-
-# Column alignment
-for i, col in enumerate(top_mvp_df.columns):
-    if i == 0:
-        gb_top.configure_column(col, minWidth=150, cellStyle={'textAlign': 'left'})
-    else:
-        gb_top.configure_column(col, minWidth=120, cellStyle={'textAlign': 'center'})
-
-gridOptions_top = gb_top.build()
-gridOptions_top['suppressAutoSize'] = True
-gridOptions_top['suppressSizeToFit'] = True
-
-AgGrid(
-    top_mvp_df,
-    gridOptions=gridOptions_top,
-    enable_enterprise_modules=False,
-    height=180,  # Smaller height for top 5
-    fit_columns_on_grid_load=False
-)
-
-
-
-# Top 5 players by % wins
-st.subheader("Serial Winners")
-st.caption("Top 5 players by ratio of games won (only players with more then 5 games played)")
-top_perc_df = players_df[players_df["Match Played"] > 5]
-top_perc_df = top_perc_df.sort_values(by="% Win", ascending=False).head(5)
-columns_to_display11 = ["Player Name", "% Win", "Games Won"]
-top_perc_df = top_perc_df[columns_to_display11]
-top_perc_df["% Win"] = top_perc_df["% Win"].round(2)
-
-# Render using AgGrid for consistency
-gb_top = GridOptionsBuilder.from_dataframe(top_perc_df)
-gb_top.configure_default_column(editable=False, sortable=True, filter=False)
-gb_top.configure_grid_options(domLayout='normal')
-gb_top.configure_grid_options(suppressHorizontalScroll=False)
-
-# Column alignment
-for i, col in enumerate(top_perc_df.columns):
-    if i == 0:
-        gb_top.configure_column(col, minWidth=150, cellStyle={'textAlign': 'left'})
+    # Top 5 boards, computed together in one cached pass per data version (see
+    # calciatori.boards); adding a board is one more entry in BOARDS.
+    top_board_dfs = top_boards(workbook)
+    for board in BOARDS:
+        st.subheader(board.title)
+        st.caption(board.caption)
+        board_df = top_board_dfs[board.title]
+        AgGrid(
+            board_df,
+            gridOptions=grid_options_for(board_df, "top"),
+            enable_enterprise_modules=False,
+            height=180,  # Smaller height for top 5
+            fit_columns_on_grid_load=False
+        )
+
+
+@st.fragment
+def progression_section(workbook):
+    """Match-by-match progression chart."""
+    # Player progression over time (interactive)
+    st.subheader("Trends Over Time")
+    st.caption("Pick a stat and one or more players to see match-by-match progression")
+
+    progress_metric_options = {
+        "Match played": "Match Played",
+        "Goal scored": "Goals Scored",
+        "Assists": "Assists",
+        "Cumulative goal scored": "Cumulative Goal Scored",
+        "Cumulative assists": "Cumulative Assists",
+        "Cumulative wins": "Cumulative Wins",
+        "Cumulative losses": "Cumulative Losses",
+        "Elo rating": "Elo",
+    }
+
+    col_metric, col_players = st.columns([1, 2])
+    with col_metric:
+        progress_metric_label = st.selectbox(
+            "Stat (Y axis)", list(progress_metric_options.keys()), index=3
+        )
+        progress_metric_col = progress_metric_options[progress_metric_label]
+
+    progress_all_players, progress_default_players = progression_players(workbook)
+
+    with col_players:
+        progress_chosen_players = st.multiselect(
+            "Players", progress_all_players, default=progress_default_players
+        )
+
+    if not progress_chosen_players:
+        st.info("Select at least one player to plot.")
     else:
-        gb_top.configure_column(col, minWidth=120, cellStyle={'textAlign': 'center'})
-
-gridOptions_top = gb_top.build()
-gridOptions_top['suppressAutoSize'] = True
-gridOptions_top['suppressSizeToFit'] = True
-
-AgGrid(
-    top_perc_df,
-    gridOptions=gridOptions_top,
-    enable_enterprise_modules=False,
-    height=180,  # Smaller height for top 5
-    fit_columns_on_grid_load=False
-)
-
-
-
-# Top 5 players by % Lost
-st.subheader("Serial Losers")
-st.caption("Top 5 players by ratio of games lost (only players with more then 5 games played)")
-top_loperc_df = players_df[players_df["Match Played"] > 5]
-top_loperc_df = top_loperc_df.sort_values(by="% Lost", ascending=False).head(5)
-columns_to_display12 = ["Player Name", "% Lost", "Games Lost"]
-top_loperc_df = top_loperc_df[columns_to_display12]
-top_loperc_df["% Lost"] = top_loperc_df["% Lost"].round(2)
-
-# Render using AgGrid for consistency
-gb_top = GridOptionsBuilder.from_dataframe(top_loperc_df)
-gb_top.configure_default_column(editable=False, sortable=True, filter=False)
-gb_top.configure_grid_options(domLayout='normal')
-gb_top.configure_grid_options(suppressHorizontalScroll=False)
-
-# Column alignment
-for i, col in enumerate(top_loperc_df.columns):
-    if i == 0:
-        gb_top.configure_column(col, minWidth=150, cellStyle={'textAlign': 'left'})
-    else:
-        gb_top.configure_column(col, minWidth=120, cellStyle={'textAlign': 'center'})
-
-gridOptions_top = gb_top.build()
-gridOptions_top['suppressAutoSize'] = True
-gridOptions_top['suppressSizeToFit'] = True
-
-AgGrid(
-    top_loperc_df,
-    gridOptions=gridOptions_top,
-    enable_enterprise_modules=False,
-    height=180,  # Smaller height for top 5
-    fit_columns_on_grid_load=False
-)
-
-
-
-# Top 5 players by own goals
-st.subheader("Il Re dell'Autogol")
-st.caption("Top 5 players by number of own goals")
-top_og_df = filtered_players_df.sort_values(by="Own Goals", ascending=False).head(5)
-columns_to_display7 = ["Player Name", "Own Goals"]
-top_og_df = top_og_df[columns_to_display7]
-
-# Render using AgGrid for consistency
-gb_top = GridOptionsBuilder.from_dataframe(top_og_df)
-gb_top.configure_default_column(editable=False, sortable=True, filter=False)
-gb_top.configure_grid_options(domLayout='normal')
-gb_top.configure_grid_options(suppressHorizontalScroll=False)
-
-# Column alignment
-for i, col in enumerate(top_og_df.columns):
-    if i == 0:
-        gb_top.configure_column(col, minWidth=150, cellStyle={'textAlign': 'left'})
+        # One row per player per match with every running total, cached per
+        # data version (and appended to as matches are added); only the chosen
+        # players' rows are taken (with the SQLite backend, only they are read).
+        progress_df = progression(workbook, progress_chosen_players)
+        # Per-player traces are cached per data version; long series are
+        # downsampled to a fixed point budget and large charts drawn with WebGL.
+        progress_fig = progression_figure(
+            workbook.version,
+            progress_metric_col,
+            progress_metric_label,
+            tuple(progress_chosen_players),
+            progress_df,
+        )
+        st.plotly_chart(progress_fig, width="stretch")
+
+
+@st.fragment
+def pairings_section(workbook):
+    """Player x player pairing heatmap."""
+    st.subheader("Player Pairing Heatmap")
+
+    pairing_kind_options = {
+        "Played together": (
+            "together",
+            "Number of times each player played with each other player. The diagonal shows the number of games played by each player, for reference.",
+        ),
+        "Played against": (
+            "against",
+            "Number of times each player played against each other player.",
+        ),
+        "Won together": (
+            "won_together",
+            "Number of wins each pair of players got on the same team. The diagonal shows the number of games won by each player.",
+        ),
+    }
+    pairing_kind_label = st.radio("Pairing", list(pairing_kind_options.keys()), horizontal=True)
+    pairing_kind, pairing_caption = pairing_kind_options[pairing_kind_label]
+    st.caption(pairing_caption)
+
+    # Computed from the lineups (same match, same/opposite team) instead of the
+    # hand-maintained Sheet2 grid; cached per data version.
+    pairing_df = player_pairings(workbook, pairing_kind)
+
+    # Rendered once per matrix and cached. The interactive version is the
+    # default: it draws the cell labels and hover values client-side, while
+    # the static image takes seconds to draw for a full roster and has no
+    # per-cell numbers past charts.HEATMAP_ANNOTATION_MAX_PLAYERS players.
+    if st.toggle("Interactive heatmap", value=True, key="pairing_interactive"):
+        st.plotly_chart(pairing_heatmap_figure(pairing_df), width="stretch")
     else:
-        gb_top.configure_column(col, minWidth=120, cellStyle={'textAlign': 'center'})
-
-gridOptions_top = gb_top.build()
-gridOptions_top['suppressAutoSize'] = True
-gridOptions_top['suppressSizeToFit'] = True
-
-AgGrid(
-    top_og_df,
-    gridOptions=gridOptions_top,
-    enable_enterprise_modules=False,
-    height=180,  # Smaller height for top 5
-    fit_columns_on_grid_load=False
-)
-
-
-# Player progression over time (interactive)
-st.subheader("Trends Over Time")
-st.caption("Pick a stat and one or more players to see match-by-match progression")
-
-# Build one row per player per match, with running totals, from lineups_df
-progress_df = lineups_df.copy()
-progress_df["Date"] = pd.to_datetime(progress_df["Date"])
-progress_df = progress_df.sort_values(["Player Name", "Date", "Match ID"])
-
-# Blank cells (no goal/assist that match) come in as NaN, which would poison
-# every cumulative total after them via cumsum(). Treat blanks as 0 instead.
-progress_df["Goals Scored"] = progress_df["Goals Scored"].fillna(0)
-progress_df["Assists"] = progress_df["Assists"].fillna(0)
-
-progress_df["Match Played"] = 1
-progress_df["Win"] = (progress_df["Result"] == "Win").astype(int)
-progress_df["Loss"] = (progress_df["Result"] == "Loss").astype(int)
-
-_grp = progress_df.groupby("Player Name", group_keys=False)
-progress_df["Match Played"] = _grp["Match Played"].cumsum()
-progress_df["Cumulative Goal Scored"] = _grp["Goals Scored"].cumsum()
-progress_df["Cumulative Assists"] = _grp["Assists"].cumsum()
-progress_df["Cumulative Wins"] = _grp["Win"].cumsum()
-progress_df["Cumulative Losses"] = _grp["Loss"].cumsum()
-
-progress_metric_options = {
-    "Match played": "Match Played",
-    "Goal scored": "Goals Scored",
-    "Assists": "Assists",
-    "Cumulative goal scored": "Cumulative Goal Scored",
-    "Cumulative assists": "Cumulative Assists",
-    "Cumulative wins": "Cumulative Wins",
-    "Cumulative losses": "Cumulative Losses",
+        st.image(pairing_heatmap_png(pairing_df), width="stretch")
+
+
+# Sections are computed only while their tab is open: with
+# on_change="rerun" the tabs track the selected one, and the others are
+# skipped. Each section is a fragment, so its own widgets rerun just that
+# section rather than the whole page.
+SECTIONS = {
+    "Matches": matches_section,
+    "Leaderboards": leaderboards_section,
+    "Trends Over Time": progression_section,
+    "Pairings": pairings_section,
 }
 
-col_metric, col_players = st.columns([1, 2])
-with col_metric:
-    progress_metric_label = st.selectbox(
-        "Stat (Y axis)", list(progress_metric_options.keys()), index=3
-    )
-    progress_metric_col = progress_metric_options[progress_metric_label]
-
-progress_all_players = sorted(progress_df["Player Name"].dropna().unique())
-progress_default_players = (
-    progress_df.groupby("Player Name")["Cumulative Goal Scored"].max()
-    .sort_values(ascending=False).head(8).index.tolist()
-)
-
-with col_players:
-    progress_chosen_players = st.multiselect(
-        "Players", progress_all_players, default=progress_default_players
-    )
-
-if not progress_chosen_players:
-    st.info("Select at least one player to plot.")
-else:
-    progress_plot_df = progress_df[progress_df["Player Name"].isin(progress_chosen_players)]
-
-    progress_fig = px.line(
-        progress_plot_df,
-        x="Date",
-        y=progress_metric_col,
-        color="Player Name",
-        markers=True,
-        labels={"Date": "Match date", progress_metric_col: progress_metric_label, "Player Name": "Player"},
-    )
-    progress_fig.update_layout(
-        legend_title_text="Player",
-        hovermode="x unified",
-        margin=dict(l=10, r=10, t=20, b=10),
-        height=480,
-    )
-    st.plotly_chart(progress_fig, use_container_width=True)
-
-
-st.subheader("Player Pairing Heatmap")
-st.caption("Number of times each player played with each other player. The diagonal shows the number of games played by each player, for reference.")
-
-# Load Sheet2
-sheet2_df = pd.read_excel(uploaded_file, sheet_name="Sheet2", engine="openpyxl")
-
-# Remove fully empty columns (Excel formatting artifacts)
-sheet2_df = sheet2_df.dropna(axis=1, how="all")
-
-# Rename first column if needed
-if "Unnamed: 0" in sheet2_df.columns:
-    sheet2_df = sheet2_df.rename(columns={"Unnamed: 0": "Player"})
-
-# Set player column as index
-sheet2_df = sheet2_df.set_index("Player")
-
-# Ensure numeric values only
-sheet2_df = sheet2_df.apply(pd.to_numeric, errors="coerce")
-
-# Dynamic figure size
-num_players = len(sheet2_df)
-fig_size = max(6, num_players * 0.7)
-
-fig, ax = plt.subplots(figsize=(fig_size, fig_size))
-
-# Plot heatmap
-cax = ax.imshow(sheet2_df, aspect='auto', cmap='magma_r', vmin=0, vmax=50)
-
-# Add colorbar
-fig.colorbar(cax)
-
-# Set ticks
-ax.set_xticks(range(len(sheet2_df.columns)))
-ax.set_yticks(range(len(sheet2_df.index)))
-
-ax.set_xticklabels(sheet2_df.columns, fontsize=15, fontweight='bold', rotation=90)
-ax.set_yticklabels(sheet2_df.index, fontsize=15, fontweight='bold')
-
-ax.tick_params(
-    top=True,
-    bottom=True,
-    labeltop=True,
-    labelbottom=True
-)
-
-# Move ticks position explicitly
-ax.xaxis.set_ticks_position('both')
-
-# 🔥 ADD NUMBERS INSIDE EACH CELL
-for i in range(len(sheet2_df.index)):
-    for j in range(len(sheet2_df.columns)):
-        value = sheet2_df.iloc[i, j]
-        if not pd.isna(value):
-            ax.text(
-                j,
-                i,
-                f"{int(value)}",
-                ha="center",
-                va="center",
-                color="white" if value > sheet2_df.values.mean() else "black",
-                fontsize=15,
-                fontweight="bold"
-            )
-
-ax.set_title("Player Pairings")
-
-plt.tight_layout()
-
-st.pyplot(fig)
-
-
-with open("CALCIATORI_RDG.xlsx", "rb") as file:
-    st.download_button(
-        label="Download Data",
-        data=file,
-        file_name="data.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+if uploaded_file:
+    # Load sheets (all of them in one pass, cached per file version)
+    try:
+        if upload is not None:
+            workbook = load_upload(upload.getvalue())
+        else:
+            workbook = load_dataset(season, DATA_FILE)
+    except WorkbookError as exc:
+        st.error(f"Can't read this file: {exc}")
+        st.stop()
+    st.caption(f"Data collected since {match_index(workbook).dates().min():%d %B %Y}")
+    section_tabs = st.tabs(list(SECTIONS), key="section", on_change="rerun")
+    for tab, render_section in zip(section_tabs, SECTIONS.values()):
+        if tab.open:
+            with tab:
+                render_section(workbook)
+
+    # Generated from the live tables (the season picked above, entered
+    # matches included) when the button is clicked, and cached per data
+    # version, so repeated downloads do not regenerate the file.
+    with st.expander("Download Data"):
+        col_format, col_players = st.columns([1, 2])
+        export_format = col_format.radio(
+            "Format", list(EXPORT_FORMATS), format_func=lambda f: EXPORT_FORMATS[f][0], key="export_format"
+        )
+        export_players = col_players.multiselect(
+            "Players (all if empty)",
+            sorted(workbook.lineups["Player Name"].dropna().astype(str).str.strip().unique()),
+            key="export_players",
+        )
+        _, export_ext, export_mime = EXPORT_FORMATS[export_format]
+        st.download_button(
+            label="Download",
+            data=lambda: export_data(workbook, export_format, export_players or None),
+            file_name=f"data.{export_ext}",
+            mime=export_mime,
+            on_click="ignore",
+        )
+
+# Memory for sizing the host: shared tables are held once per process,
+# session state once per viewer.
+with st.sidebar.expander("Memory"):
+    memory = memory_report()
+    st.caption(
+        f"Shared by all sessions: {memory['shared_total'] / 1e6:.1f} MB "
+        f"({memory['shared_used'] / 1e6:.1f} MB used by this session). "
+        f"This session's own state: {memory['session'] / 1e6:.2f} MB."
     )
@@ -0,0 +1 @@
+"""Shared data and analytics helpers for the Calciatori di Reading apps."""
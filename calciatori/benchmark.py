@@ -0,0 +1,248 @@
+"""Benchmarks for the data pipeline and renderers at increasing data sizes.
+
+Synthetic workbooks are generated in the layout of CALCIATORI_RDG.xlsx
+(Players, Matches, Team Lineups and Sheet2, same columns; values instead of
+the spreadsheet's formulas) for each scale in ``SCALES``, from 10 matches
+among 20 players to 10,000 matches among 500. Every stage the dashboards go
+through is then timed on it, uncached:
+
+* ``sheet_load``          - pandas/openpyxl parse of the .xlsx
+* ``sheet_load_stream``   - read-only streaming parse (uploads)
+* ``snapshot_load``       - Parquet snapshot read
+* ``leaderboard``         - Players table from the lineups
+* ``top_boards``          - every top-N board
+* ``progression``         - per-player running totals (cumsums)
+* ``elo``                 - Elo replay of every match
+* ``team_generation``     - ratings plus the balanced split of a match-day pool
+* ``pairings``            - pairing matrix from the lineups
+* ``heatmap_png``         - static pairing heatmap (unannotated above
+  charts.HEATMAP_ANNOTATION_MAX_PLAYERS players)
+* ``heatmap_interactive`` - Plotly pairing heatmap
+
+Each stage runs ``--repeat`` times; the best and median wall-clock seconds
+are written to a JSON file together with the commit and library versions, so
+runs of different versions can be compared::
+
+    python -m calciatori.benchmark --output bench-new.json --compare bench-old.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from calciatori import boards, charts, ratings, snapshot, stats, teams
+from calciatori.elo import EloEngine
+from calciatori.pairings import pairing_matrix
+from calciatori.snapshot import LINEUPS_SHEET, MATCHES_SHEET, PAIRINGS_SHEET, PLAYERS_SHEET
+
+# (matches, players)
+SCALES = ((10, 20), (100, 50), (1000, 150), (10000, 500))
+
+# Column headers of the source workbook's sheets.
+PLAYERS_HEADER = ["Player Name", "Position", *stats.PLAYERS_COLUMNS[1:]]
+MATCHES_HEADER = ["Match ID", "Date", "Team", "Score", "Goals Team A", "Goals Team B", "MVP"]
+LINEUPS_HEADER = [
+    "Match ID", "Date", "Player Name", "Team (A/B)", "Team Score", "Team Conceded",
+    "Result", "Goals Scored", "Assists", "Own Goals", "Unique Team ID",
+]
+
+
+def synthetic_workbook(path, n_matches, n_players, seed=0):
+    """Write a workbook of ``n_matches`` weekly matches among ``n_players``.
+
+    Each match has 10-16 players drawn with uneven attendance (regulars play
+    far more often than occasional players), split into two teams, with
+    Poisson goals and assists and the odd own goal.
+    """
+    rng = np.random.default_rng(seed)
+    names = [f"Player {i:03d}" for i in range(1, n_players + 1)]
+    attendance = 1.0 / np.arange(1, n_players + 1) ** 0.8
+    attendance /= attendance.sum()
+    start = pd.Timestamp("2000-01-06")
+
+    wb = openpyxl.Workbook(write_only=True)
+    players_ws = wb.create_sheet(PLAYERS_SHEET)
+    matches_ws = wb.create_sheet(MATCHES_SHEET)
+    lineups_ws = wb.create_sheet(LINEUPS_SHEET)
+    pairings_ws = wb.create_sheet(PAIRINGS_SHEET)
+
+    players_ws.append(PLAYERS_HEADER)
+    for name in names:
+        players_ws.append([name])
+    matches_ws.append(MATCHES_HEADER)
+    lineups_ws.append(LINEUPS_HEADER)
+
+    for match_id in range(1, n_matches + 1):
+        day = (start + pd.Timedelta(weeks=match_id - 1)).to_pydatetime()
+        size = min(int(rng.integers(10, 17)), n_players)
+        pool = rng.choice(n_players, size=size, replace=False, p=attendance)
+        side = np.array(["A"] * (size // 2) + ["B"] * (size - size // 2))
+        goals = rng.poisson(1.0, size)
+        assists = np.minimum(rng.poisson(0.6, size), goals.sum())
+        own_goals = rng.binomial(1, 0.03, size)
+        score = {
+            s: int(goals[side == s].sum() + own_goals[side != s].sum()) for s in ("A", "B")
+        }
+        winner = "A" if score["A"] > score["B"] else "B" if score["B"] > score["A"] else None
+        mvp_side = winner or "A"
+        mvp = names[pool[side == mvp_side][np.argmax(goals[side == mvp_side])]]
+        matches_ws.append([
+            match_id, day, "Team A vs Team B", f"{score['A']}-{score['B']}",
+            score["A"], score["B"], mvp,
+        ])
+        for player, s, g, a, og in zip(pool, side, goals, assists, own_goals):
+            other = "B" if s == "A" else "A"
+            result = "Draw" if winner is None else "Win" if winner == s else "Loss"
+            lineups_ws.append([
+                match_id, day, names[player], s, score[s], score[other], result,
+                int(g), int(a), int(og) or None, f"{match_id}_{s}",
+            ])
+
+    pairings_ws.append([None, *names])
+    wb.save(path)
+    return path
+
+
+def time_stage(func, repeat):
+    """(best, median) wall-clock seconds of ``repeat`` calls, and the last result."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return {"best": min(times), "median": statistics.median(times)}, result
+
+
+def run_scale(path, repeat=3):
+    """{stage: timings} for the workbook at ``path``."""
+    results = {}
+
+    def stage(name, func):
+        timings, value = time_stage(func, repeat)
+        results[name] = timings
+        return value
+
+    sheets = stage("sheet_load", lambda: snapshot.read_excel_sheets(path))
+    stage("sheet_load_stream", lambda: snapshot.read_excel_stream(path))
+    digest = snapshot.file_sha1(path)
+    snapshot.write_snapshot(path, sheets, digest)
+    stage("snapshot_load", lambda: snapshot.read_snapshot(path, digest))
+
+    lineups, matches = sheets[LINEUPS_SHEET], sheets[MATCHES_SHEET]
+    roster = sheets[PLAYERS_SHEET]["Player Name"]
+    players = stage("leaderboard", lambda: stats.build_players_table(lineups, matches, roster))
+    stage("top_boards", lambda: boards.top_boards(players))
+    stage("progression", lambda: stats.progression_table(lineups))
+    elo = stage("elo", lambda: EloEngine().update(lineups).table())
+
+    together = pairing_matrix(lineups, "together")
+    last_match = lineups["Match ID"].max()
+    pool = lineups.loc[lineups["Match ID"] == last_match, "Player Name"].astype(str).str.strip()
+
+    def generate_teams():
+        rated = ratings.rate(ratings.rating_features(players, elo)).set_index("Player Name")
+        pool_ratings = rated["Rating"].reindex(pool).fillna(0).to_dict()
+        return teams.balance_teams(pool_ratings, pairings=together, variety=0.3)
+
+    stage("team_generation", generate_teams)
+    matrix = stage("pairings", lambda: pairing_matrix(lineups, "together"))
+    # The undecorated renderers: st.cache_data would time a cache hit.
+    stage("heatmap_png", lambda: charts.pairing_heatmap_png.__wrapped__(matrix))
+    stage("heatmap_interactive", lambda: charts.pairing_heatmap_figure.__wrapped__(matrix))
+    return results, {"lineup_rows": len(lineups), "players_played": len(matrix)}
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales=SCALES, repeat=3, workdir=None, seed=0):
+    """Benchmark every (matches, players) scale; the JSON-ready report."""
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "openpyxl": openpyxl.__version__,
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "seed": seed,
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = workdir or tmp
+        os.makedirs(directory, exist_ok=True)
+        for n_matches, n_players in scales:
+            path = os.path.join(directory, f"synthetic_{n_matches}x{n_players}_{seed}.xlsx")
+            if not os.path.exists(path):
+                print(f"generating {path}", file=sys.stderr)
+                synthetic_workbook(path, n_matches, n_players, seed)
+            print(f"benchmarking {n_matches} matches x {n_players} players", file=sys.stderr)
+            stages, sizes = run_scale(path, repeat)
+            report["results"].append({"matches": n_matches, "players": n_players, **sizes, "stages": stages})
+    return report
+
+
+def compare(report, baseline):
+    """Lines of best-time ratios (new / old) for the scales both reports have."""
+    old = {(r["matches"], r["players"]): r["stages"] for r in baseline["results"]}
+    lines = []
+    for result in report["results"]:
+        before = old.get((result["matches"], result["players"]))
+        if before is None:
+            continue
+        for name, timings in result["stages"].items():
+            if "best" in timings and "best" in before.get(name, {}):
+                ratio = timings["best"] / max(before[name]["best"], 1e-9)
+                flag = "  <-- slower" if ratio > 1.2 else ""
+                lines.append(
+                    f"{result['matches']:>6} x {result['players']:<4} {name:<20} "
+                    f"{before[name]['best']:9.4f}s -> {timings['best']:9.4f}s  x{ratio:.2f}{flag}"
+                )
+    return lines
+
+
+def _scale(text):
+    matches, players = text.lower().split("x")
+    return int(matches), int(players)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", type=_scale, default=list(SCALES),
+                        metavar="MATCHESxPLAYERS", help="e.g. 10x20 1000x150 (default: all of SCALES)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="keep the generated workbooks here and reuse them")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    report = run(args.scales, args.repeat, args.workdir, args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print("\n".join(compare(report, json.load(f))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Top-N leaderboards ("Veterani", "Capocannonieri", ...) from the Players table.
+
+Every board is one ``Board`` entry in ``BOARDS``. ``top_boards()`` builds
+all of them in one pass: the sort columns are pulled into a single NumPy
+array once, and each board picks its rows with ``np.partition`` (linear
+time) and only sorts the handful of candidates, instead of sorting the whole
+table once per board. Ties keep the Players table order.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+TOP_N = 5
+
+
+class Board(NamedTuple):
+    title: str
+    caption: str
+    sort_by: str
+    columns: tuple
+    # Only players with at least this many games are ranked.
+    min_played: int = 1
+    # Columns rounded to 2 decimals for display.
+    rounded: tuple = ()
+
+
+BOARDS = (
+    Board("Veterani", "Top 5 players by number of matches played",
+          "Match Played", ("Player Name", "Match Played")),
+    Board("Capocannonieri", "Top 5 players by number of goals scored",
+          "Goal Scored", ("Player Name", "Goal Scored", "Goal/Game"), rounded=("Goal/Game",)),
+    Board("Fantasisti", "Top 5 players by number of assists",
+          "Assists", ("Player Name", "Assists")),
+    Board("MVP", "Top 5 players by number of MVP awards",
+          "MVP", ("Player Name", "MVP")),
+    Board("Serial Winners", "Top 5 players by ratio of games won (only players with more then 5 games played)",
+          "% Win", ("Player Name", "% Win", "Games Won"), min_played=6, rounded=("% Win",)),
+    Board("Serial Losers", "Top 5 players by ratio of games lost (only players with more then 5 games played)",
+          "% Lost", ("Player Name", "% Lost", "Games Lost"), min_played=6, rounded=("% Lost",)),
+    Board("Il Re dell'Autogol", "Top 5 players by number of own goals",
+          "Own Goals", ("Player Name", "Own Goals")),
+)
+
+
+def top_rows(values, eligible, n=TOP_N):
+    """Positions of the ``n`` largest ``values`` among ``eligible`` rows,
+    largest first; ties keep row order and NaNs are never ranked."""
+    rows = np.flatnonzero(eligible & ~np.isnan(values))
+    if len(rows) > n:
+        candidates = values[rows]
+        nth_largest = np.partition(candidates, len(rows) - n)[len(rows) - n]
+        rows = rows[candidates >= nth_largest]
+    order = np.lexsort((rows, -values[rows]))
+    return rows[order][:n]
+
+
+def top_boards(players_df, boards=BOARDS, n=TOP_N):
+    """{board title: top-``n`` DataFrame} for every board, in one pass."""
+    sort_cols = list(dict.fromkeys(["Match Played", *(b.sort_by for b in boards)]))
+    view = players_df[sort_cols].to_numpy(dtype=float)
+    position = {c: i for i, c in enumerate(sort_cols)}
+    played = np.nan_to_num(view[:, position["Match Played"]])
+
+    results = {}
+    for board in boards:
+        rows = top_rows(view[:, position[board.sort_by]], played >= board.min_played, n)
+        df = players_df.iloc[rows][list(board.columns)].reset_index(drop=True)
+        for col in board.rounded:
+            df[col] = df[col].round(2)
+        results[board.title] = df
+    return results
@@ -0,0 +1,240 @@
+"""Figure builders for the dashboards, cached by their input data.
+
+Each renderer returns finished output (PNG bytes or a Plotly figure) and is
+wrapped in ``st.cache_data``, so a rerun with unchanged data is a cache hit
+instead of a fresh matplotlib draw. The progression chart is the exception:
+its traces are cached one per player and the figure assembled from them.
+"""
+from io import BytesIO
+
+import matplotlib.pyplot as plt
+from matplotlib.font_manager import FontProperties
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+# Points per player line in the progression chart: roughly one per couple of
+# pixels of a chart's width, so payload size follows the screen rather than
+# the length of the history.
+DEFAULT_POINT_BUDGET = 600
+# Above this many points in total the progression chart switches to WebGL.
+WEBGL_THRESHOLD = 5000
+
+# Above this many players the static pairing heatmap drops its per-cell
+# numbers and stops growing. Each number is a text artist (~1.5 ms to create
+# and draw), so drawing time grows with the square of the roster: annotated,
+# about 0.7s at 20 players, 1.4s at 30 and 2.6s at 40, but 3.7s at 47-50,
+# against about 1s unannotated. The apps show the interactive heatmap, which
+# draws its numbers client-side, by default.
+HEATMAP_ANNOTATION_MAX_PLAYERS = 40
+# Size of one heatmap cell, font size of its number and of the player names,
+# and the PNG resolution. The image is shown at the page's width, so more
+# pixels than that only cost drawing time.
+_HEATMAP_CELL_INCHES = 0.35
+_HEATMAP_FONT_SIZE = 7.5
+_HEATMAP_DPI = 100
+
+# Same defaults st.pyplot uses, so cached PNGs look like the old figures.
+_SAVEFIG_OPTIONS = {"format": "png", "bbox_inches": "tight", "dpi": 200}
+
+
+def figure_to_png(fig, **savefig_kwargs):
+    """Render ``fig`` to PNG bytes and release it."""
+    buf = BytesIO()
+    fig.savefig(buf, **{**_SAVEFIG_OPTIONS, **savefig_kwargs})
+    plt.close(fig)
+    return buf.getvalue()
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def scoreboard_png(version, match_id, _lineup):
+    """Scoreboard of one Giornata from its rows of the Lineups sheet.
+
+    Cached per (data version, Match ID), so browsing back to a match or
+    rerunning the page never redraws it.
+    """
+    team = _lineup["Team (A/B)"].astype(str).to_numpy()
+    team_score = _lineup["Team Score"].to_numpy()
+    goals = pd.to_numeric(_lineup["Goals Scored"], errors="coerce").fillna(0).to_numpy()
+    names = _lineup["Player Name"].astype(str).to_numpy()
+
+    scores, scorers = {}, {}
+    for side in ("A", "B"):
+        on_side = team == side
+        scores[side] = team_score[on_side][0] if on_side.any() else "-"
+        scored = on_side & (goals > 0)
+        scorers[side] = [f"{n} ({int(g)})" for n, g in zip(names[scored], goals[scored])] or ["-"]
+
+    # Dynamic figure height based on max scorers
+    max_scorers = max(len(scorers["A"]), len(scorers["B"]))
+    fig, ax = plt.subplots(figsize=(6, 2 + max_scorers * 0.3))
+    ax.axis("off")
+
+    match_date = pd.Timestamp(_lineup["Date"].iloc[0]).strftime("%d %B %Y")
+    ax.set_title(f"{match_id}° Giornata  ({match_date})", fontsize=12, fontweight="bold", ha="center")
+
+    # Home (A) on the left, Away (B) on the right, scorers listed below
+    start_y, line_height = 0.65, 0.08
+    for x, side, label, color in ((0.25, "A", "Home", "blue"), (0.75, "B", "Away", "red")):
+        ax.text(x, 0.9, label, fontsize=12, ha="center")
+        ax.text(x, 0.7, str(scores[side]), fontsize=24, ha="center", fontweight="bold", color=color)
+        for i, line in enumerate(scorers[side]):
+            ax.text(x, start_y - (i + 1) * line_height, line, fontsize=10, ha="center")
+    ax.text(0.5, 0.7, "VS", fontsize=12, ha="center")
+    return figure_to_png(fig)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def pairing_heatmap_png(matrix, vmax=50, title="Player Pairings"):
+    """Static heatmap of a square pairing matrix, annotated in every cell.
+
+    Cached on the matrix contents. Cell values, text colours and positions
+    are computed as arrays up front; the colour threshold (matrix mean) is
+    evaluated once rather than per cell, and the numbers share one font.
+    Above HEATMAP_ANNOTATION_MAX_PLAYERS players the cells are not annotated
+    and the figure keeps the size it has at that many players, with smaller
+    labels.
+    """
+    values = matrix.to_numpy(dtype=float)
+    n_rows, n_cols = values.shape
+    annotate = max(n_rows, n_cols) <= HEATMAP_ANNOTATION_MAX_PLAYERS
+    fig_size = max(6, min(n_rows, HEATMAP_ANNOTATION_MAX_PLAYERS) * _HEATMAP_CELL_INCHES)
+    label_size = _HEATMAP_FONT_SIZE
+    if not annotate:
+        label_size = max(1, label_size * HEATMAP_ANNOTATION_MAX_PLAYERS / max(n_rows, n_cols))
+
+    fig, ax = plt.subplots(figsize=(fig_size, fig_size))
+    cax = ax.imshow(values, aspect="auto", cmap="magma_r", vmin=0, vmax=vmax,
+                    interpolation="nearest")
+    fig.colorbar(cax)
+
+    ax.set_xticks(range(n_cols))
+    ax.set_yticks(range(n_rows))
+    ax.set_xticklabels(matrix.columns, fontsize=label_size, fontweight="bold", rotation=90)
+    ax.set_yticklabels(matrix.index, fontsize=label_size, fontweight="bold")
+    ax.tick_params(top=True, bottom=True, labeltop=True, labelbottom=True)
+    ax.xaxis.set_ticks_position("both")
+    ax.set_title(title)
+
+    # Crop box measured before the cell numbers are added: with
+    # bbox_inches="tight" savefig would lay out every one of them an extra
+    # time just to find the edges of the tick labels.
+    bbox = fig.get_tightbbox().padded(plt.rcParams["savefig.pad_inches"])
+
+    # Numbers inside each cell
+    if annotate:
+        threshold = np.nanmean(values) if np.isfinite(values).any() else 0.0
+        rows, cols = np.nonzero(~np.isnan(values))
+        cell_values = values[rows, cols]
+        labels = cell_values.astype(np.int64).astype(str)
+        colors = np.where(cell_values > threshold, "white", "black")
+        font = FontProperties(size=_HEATMAP_FONT_SIZE, weight="bold")
+        for x, y, label, color in zip(cols.tolist(), rows.tolist(), labels, colors):
+            ax.text(x, y, label, ha="center", va="center", color=color, fontproperties=font)
+
+    return figure_to_png(fig, dpi=_HEATMAP_DPI, bbox_inches=bbox)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def pairing_heatmap_figure(matrix, vmax=50, title="Player Pairings"):
+    """Interactive Plotly heatmap; annotations and hover values are drawn
+    client-side in one trace instead of one artist per cell."""
+    n = len(matrix)
+    fig = px.imshow(
+        matrix,
+        text_auto=True,
+        color_continuous_scale="magma_r",
+        zmin=0,
+        zmax=vmax,
+        aspect="auto",
+        labels={"x": "Player", "y": "Player", "color": "Games"},
+    )
+    fig.update_xaxes(side="top", tickangle=-90)
+    fig.update_layout(
+        title=title,
+        height=max(480, 22 * n),
+        margin=dict(l=10, r=10, t=80, b=10),
+    )
+    return fig
+
+
+def lttb(x, y, n_out):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last point and, from each of ``n_out - 2`` equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the next bucket's average, which preserves the
+    visual shape of the series.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], max(edges[i + 2], edges[i + 1] + 1))
+            cx, cy = x[nxt].mean(), y[nxt].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def progression_trace(version, metric, player, point_budget, _table):
+    """(dates, values) of one player for one metric, downsampled with LTTB to
+    ``point_budget`` points; cached per (data version, metric, player)."""
+    rows = _table[_table["Player Name"] == player]
+    x = rows["Date"].to_numpy()
+    y = rows[metric].to_numpy(dtype=float)
+    keep = lttb(x.astype("datetime64[ns]").astype(np.int64), y, point_budget)
+    return x[keep], y[keep]
+
+
+def progression_figure(version, metric, metric_label, players, _table,
+                       point_budget=DEFAULT_POINT_BUDGET, webgl=None):
+    """Line chart of ``metric`` for ``players``, one trace per player.
+
+    Each player's trace is cached on its own (see progression_trace), so
+    adding or removing a player only computes that player's trace; the
+    figure itself is just assembled from them. ``webgl`` forces (True) or
+    disables (False) ``scattergl``; by default it is used once the chart
+    holds more than WEBGL_THRESHOLD points.
+    """
+    present = set(_table["Player Name"].unique())
+    series = [
+        (name, *progression_trace(version, metric, name, point_budget, _table))
+        for name in sorted(players) if name in present
+    ]
+    n_points = sum(len(x) for _, x, _ in series)
+    if webgl is None:
+        webgl = n_points > WEBGL_THRESHOLD
+    scatter = go.Scattergl if webgl else go.Scatter
+    colors = px.colors.qualitative.Plotly
+
+    fig = go.Figure()
+    for i, (name, x, y) in enumerate(series):
+        fig.add_trace(scatter(
+            x=x, y=y, name=name, mode="lines+markers",
+            line=dict(color=colors[i % len(colors)]),
+            hovertemplate=f"{name}: %{{y}}<extra></extra>",
+        ))
+    fig.update_layout(
+        xaxis_title="Match date",
+        yaxis_title=metric_label,
+        legend_title_text="Player",
+        hovermode="x unified",
+        margin=dict(l=10, r=10, t=20, b=10),
+        height=480,
+    )
+    return fig
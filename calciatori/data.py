@@ -0,0 +1,578 @@
+"""Workbook access layer shared by both Streamlit apps.
+
+The Excel file is parsed once per content change: every sheet is read in a
+single pass and the resulting DataFrames are cached, keyed on the file's
+mtime/size (cheap to check on each rerun) and on its content hash (so a
+touched-but-identical file is not parsed again).
+
+Loads go through the columnar snapshot (see ``calciatori.snapshot``) first;
+the Excel file is only parsed when the snapshot is missing or stale, and the
+snapshot is then rebuilt from it.
+
+Parsed workbooks and derived tables are cached with ``@shared`` (see
+``calciatori.store``): one read-only copy in the process, whichever session
+asked for it first, instead of one copy per viewer.
+
+With ``CALCIATORI_BACKEND=sqlite`` the leaderboards, top-N boards,
+progression and pairings are queried from a SQLite mirror of the workbook
+(see ``calciatori.database``) instead of being computed with pandas.
+"""
+import dataclasses
+import hashlib
+import json
+import os
+import tempfile
+from functools import reduce
+from io import BytesIO
+
+import pandas as pd
+import streamlit as st
+
+from calciatori import snapshot
+from calciatori import boards
+from calciatori import database
+from calciatori import entries
+from calciatori import export
+from calciatori import ratings
+from calciatori import seasons
+from calciatori.elo import EloEngine
+from calciatori.matches import MatchIndex
+from calciatori.pairings import PairingAggregator
+from calciatori.stats import PlayerAggregator, ProgressionAggregator, players_table
+from calciatori.store import shared, shared_state
+from calciatori.snapshot import LINEUPS_SHEET, MATCHES_SHEET, PAIRINGS_SHEET, PLAYERS_SHEET
+
+DATA_FILE = "CALCIATORI_RDG.xlsx"
+
+# Saved Elo state, kept alongside the snapshot of the same workbook.
+ELO_STATE_FILE = "elo.json"
+# Squad saved from the team generator, kept in the same place.
+SQUAD_FILE = "squad.json"
+
+# Uploaded workbooks have no file on disk; their caches and saved state are
+# keyed on a stand-in path here, named after the content hash.
+UPLOAD_DIR = os.path.join(tempfile.gettempdir(), "calciatori-uploads")
+
+# Where derived tables are computed: "pandas" (in memory) or "sqlite".
+BACKEND = os.environ.get("CALCIATORI_BACKEND", "pandas")
+
+# Whether the apps offer adding and removing matches (see calciatori.entries).
+# Off unless the deployment opts in: entries are written to the shared data.
+MATCH_ENTRY = os.environ.get("CALCIATORI_MATCH_ENTRY") == "1"
+
+
+@dataclasses.dataclass(frozen=True)
+class Workbook:
+    players: pd.DataFrame
+    matches: pd.DataFrame
+    lineups: pd.DataFrame
+    sheet2: pd.DataFrame
+    path: str
+    # Content hash of the source file, used as the data version by the
+    # caches of derived tables.
+    version: str
+    # For a dataset stacked from several seasons (see calciatori.seasons),
+    # the per-season workbooks it was built from.
+    parts: tuple = ()
+
+
+def file_signature(path):
+    """(absolute path, mtime_ns, size) - changes whenever the file is rewritten."""
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+@st.cache_data(show_spinner=False)
+def _file_digest(path, mtime_ns, size):
+    return snapshot.file_sha1(path)
+
+
+@shared(show_spinner="Loading data...")
+def _parse_workbook(path, digest):
+    sheets = snapshot.read_snapshot(path, digest)
+    if sheets is None:
+        sheets = snapshot.read_excel_sheets(path)
+        try:
+            snapshot.write_snapshot(path, sheets, digest)
+        except OSError:
+            # Read-only deployment: keep serving from the Excel parse.
+            pass
+    return Workbook(
+        players=sheets[PLAYERS_SHEET],
+        matches=sheets[MATCHES_SHEET],
+        lineups=sheets[LINEUPS_SHEET],
+        sheet2=sheets[PAIRINGS_SHEET],
+        path=path,
+        version=digest,
+    )
+
+
+@shared()
+def _with_entries(path, version, _workbook):
+    lineups, matches = entries.merge_entries(
+        _workbook.lineups, _workbook.matches, *entries.load_entries(path)
+    )
+    return dataclasses.replace(_workbook, lineups=lineups, matches=matches, version=version)
+
+
+def load_workbook(path=DATA_FILE):
+    """Return the parsed workbook, re-reading the file only when it changed.
+
+    Matches entered from the app (see calciatori.entries) are appended; the
+    data version then also covers the entries log, so only the log is read
+    again after a new entry, never the Excel file.
+    """
+    path, mtime_ns, size = file_signature(path)
+    workbook = _parse_workbook(path, _file_digest(path, mtime_ns, size))
+    log = entries.entries_path(path)
+    if not os.path.exists(log):
+        return workbook
+    log, log_mtime_ns, log_size = file_signature(log)
+    log_digest = _file_digest(log, log_mtime_ns, log_size)
+    version = hashlib.sha1(f"{workbook.version}:{log_digest}".encode()).hexdigest()
+    return _with_entries(path, version, workbook)
+
+
+def add_match(workbook, entry):
+    """Append a match entered in the app to ``workbook``'s entries log.
+
+    Raises ValueError if it is incomplete or its Match ID is taken. The next
+    load_workbook() picks it up.
+    """
+    entries.add_match(workbook.path, entry, workbook.matches["Match ID"].dropna().astype(int))
+
+
+def entered_matches(workbook):
+    """Match IDs entered in the app for ``workbook``, which remove_match() accepts."""
+    return sorted(entries.load_entries(workbook.path)[1]["Match ID"].astype(int).tolist())
+
+
+def remove_match(workbook, match_id):
+    """Remove a match entered in the app from ``workbook``'s entries log.
+
+    Raises ValueError if ``match_id`` was not entered in the app.
+    """
+    entries.remove_match(workbook.path, match_id)
+
+
+@shared(show_spinner="Reading upload...")
+def _parse_upload(digest, _data):
+    sheets = snapshot.read_excel_stream(BytesIO(_data))
+    return Workbook(
+        players=sheets[PLAYERS_SHEET],
+        matches=sheets[MATCHES_SHEET],
+        lineups=sheets[LINEUPS_SHEET],
+        sheet2=sheets[PAIRINGS_SHEET],
+        path=os.path.join(UPLOAD_DIR, f"{digest}.xlsx"),
+        version=digest,
+    )
+
+
+def load_upload(data):
+    """Workbook from the bytes of an uploaded .xlsx, cached by content hash.
+
+    Parsed in memory with openpyxl's read-only mode (see
+    snapshot.read_excel_stream); raises snapshot.WorkbookError if the file
+    does not have the expected sheets and columns.
+    """
+    return _parse_upload(hashlib.sha1(data).hexdigest(), data)
+
+
+def season_files(current_file=DATA_FILE):
+    """{season label: workbook path}, oldest first (see calciatori.seasons)."""
+    return seasons.discover_seasons(current_file)
+
+
+@shared(show_spinner="Combining seasons...")
+def _all_time_workbook(path, version, _parts):
+    sheets = seasons.combine_sheets([
+        {PLAYERS_SHEET: p.players, MATCHES_SHEET: p.matches, LINEUPS_SHEET: p.lineups,
+         PAIRINGS_SHEET: p.sheet2}
+        for p in _parts
+    ])
+    return Workbook(
+        players=sheets[PLAYERS_SHEET],
+        matches=sheets[MATCHES_SHEET],
+        lineups=sheets[LINEUPS_SHEET],
+        sheet2=sheets[PAIRINGS_SHEET],
+        path=path,
+        version=version,
+        parts=tuple(_parts),
+    )
+
+
+def load_dataset(season=seasons.CURRENT_SEASON, current_file=DATA_FILE):
+    """Workbook of one season, or of all of them for ``seasons.ALL_TIME``.
+
+    Only the requested season's file is loaded; "All time" loads every season
+    through its own cache and stacks them.
+    """
+    files = season_files(current_file)
+    if season != seasons.ALL_TIME:
+        return load_workbook(files[season])
+    parts = [load_workbook(path) for path in files.values()]
+    if len(parts) == 1:
+        return parts[0]
+    version = hashlib.sha1("|".join(p.version for p in parts).encode()).hexdigest()
+    return _all_time_workbook(seasons.all_time_path(current_file), version, parts)
+
+
+# --- Derived tables -------------------------------------------------------
+# Cached per data version. Arguments starting with "_" are not hashed by
+# Streamlit: the version string already identifies their contents.
+# Like the workbook itself, they are shared read-only by every session (see
+# calciatori.store). The running aggregators they are built from are
+# @shared_state: one per data file, updated in place.
+
+
+@shared_state()
+def _sql_backend(path):
+    # One database per data file, kept in its snapshot directory.
+    return database.SqlBackend(os.path.join(snapshot.snapshot_dir(path), database.DATABASE_FILE))
+
+
+@shared()
+def _synced_backend(path, version, _lineups, _matches, _roster):
+    # Cached only so that each data version is synced once. The backend
+    # itself is sized under _sql_backend, so nothing is returned here.
+    _sql_backend(path).update(_lineups, _matches, _roster)
+
+
+def _backend(workbook):
+    """The SQLite backend, up to date with ``workbook``; None with pandas."""
+    if BACKEND != "sqlite":
+        return None
+    _synced_backend(
+        workbook.path, workbook.version,
+        workbook.lineups, workbook.matches, workbook.players["Player Name"],
+    )
+    return _sql_backend(workbook.path)
+
+
+@shared()
+def _sql_players_table(path, version, _backend):
+    return _backend.players_table()
+
+
+@shared_state()
+def _player_aggregator(path):
+    # One running aggregator per data file, shared by all sessions, so a new
+    # data version only aggregates the Match IDs appended since the last one.
+    return PlayerAggregator()
+
+
+@shared()
+def _players_table(path, version, _lineups, _matches, _roster):
+    return _player_aggregator(path).update(_lineups, _matches).table(_roster)
+
+
+@shared()
+def _season_totals(path, version, _lineups, _matches):
+    return _player_aggregator(path).update(_lineups, _matches).current_totals()
+
+
+@shared()
+def _all_time_players_table(version, _parts):
+    totals = [_season_totals(p.path, p.version, p.lineups, p.matches) for p in _parts]
+    summed = reduce(lambda a, b: a.add(b, fill_value=0), totals)
+    roster = pd.concat([p.players["Player Name"].astype(object) for p in _parts]).drop_duplicates()
+    return players_table(summed, roster)
+
+
+def player_stats(workbook):
+    """Players table derived from the lineups (see calciatori.stats)."""
+    if workbook.parts:
+        # Summed from each season's cached totals instead of re-aggregating
+        # every season's lineups.
+        return _all_time_players_table(workbook.version, workbook.parts)
+    backend = _backend(workbook)
+    if backend is not None:
+        return _sql_players_table(workbook.path, workbook.version, backend)
+    return _players_table(
+        workbook.path, workbook.version,
+        workbook.lineups, workbook.matches, workbook.players["Player Name"],
+    )
+
+
+@shared_state()
+def _pairing_aggregator(path):
+    return PairingAggregator()
+
+
+@shared(max_entries=16)
+def _pairing_matrix(path, version, kind, _lineups):
+    return _pairing_aggregator(path).update(_lineups).matrix(kind)
+
+
+@shared(max_entries=16)
+def _sql_pairing_matrix(path, version, kind, _backend):
+    return _backend.pairing_matrix(kind)
+
+
+def player_pairings(workbook, kind="together"):
+    """Player x player pairing matrix (see calciatori.pairings.PAIRING_KINDS)."""
+    backend = _backend(workbook)
+    if backend is not None:
+        return _sql_pairing_matrix(workbook.path, workbook.version, kind, backend)
+    return _pairing_matrix(workbook.path, workbook.version, kind, workbook.lineups)
+
+
+def _elo_state_path(path):
+    return os.path.join(snapshot.snapshot_dir(path), ELO_STATE_FILE)
+
+
+@shared_state()
+def _elo_engine(path):
+    # Resumes from the saved state, so after a restart only matches added
+    # since the last save are replayed.
+    return EloEngine.load(_elo_state_path(path))
+
+
+@shared()
+def _elo_tables(path, version, _lineups):
+    engine = _elo_engine(path)
+    seen = engine.fingerprints
+    engine.update(_lineups)
+    if not engine.fingerprints.equals(seen):
+        try:
+            os.makedirs(os.path.dirname(_elo_state_path(path)), exist_ok=True)
+            engine.save(_elo_state_path(path))
+        except OSError:
+            pass
+    return engine.table(), engine.history()
+
+
+def player_elo(workbook):
+    """Current Elo per player (see calciatori.elo)."""
+    return _elo_tables(workbook.path, workbook.version, workbook.lineups)[0]
+
+
+def elo_history(workbook):
+    """Elo of every player after every match they played."""
+    return _elo_tables(workbook.path, workbook.version, workbook.lineups)[1]
+
+
+@shared_state()
+def _progression_aggregator(path):
+    return ProgressionAggregator()
+
+
+@shared()
+def _progression_table(path, version, _lineups, _elo_history):
+    return _with_elo(_progression_aggregator(path).update(_lineups).table(), _elo_history)
+
+
+def _with_elo(table, elo_history):
+    # Elo after each match (keyed by team too: a player can appear for both
+    # sides of one match).
+    key = ["Player Name", "Match ID", "Team (A/B)"]
+    elo = elo_history.set_index(key)["Elo"]
+    table["Elo"] = elo.reindex(pd.MultiIndex.from_frame(table[key])).to_numpy()
+    return table
+
+
+@shared(max_entries=32)
+def _sql_progression(path, version, players, _backend, _elo_history):
+    return _with_elo(_backend.progression(players), _elo_history)
+
+
+def progression(workbook, players=None):
+    """One row per player per match with every running total (and Elo).
+
+    ``players`` optionally limits the rows to those players.
+    """
+    backend = _backend(workbook)
+    if backend is not None:
+        if players is None:
+            players = backend.progression_players(0)[0]
+        return _sql_progression(
+            workbook.path, workbook.version, tuple(players), backend, elo_history(workbook)
+        )
+    table = _progression_table(
+        workbook.path, workbook.version, workbook.lineups, elo_history(workbook)
+    )
+    if players is not None:
+        table = table[table["Player Name"].isin(players)]
+    return table
+
+
+@shared()
+def _sql_progression_players(path, version, n, _backend):
+    return _backend.progression_players(n)
+
+
+@shared()
+def _progression_players(path, version, n, _table):
+    leaders = (
+        _table.groupby("Player Name")["Cumulative Goal Scored"].max()
+        .sort_values(ascending=False).head(n).index.tolist()
+    )
+    return sorted(_table["Player Name"].dropna().unique()), leaders
+
+
+def progression_players(workbook, n_default=8):
+    """(all players, top ``n_default`` scorers) for the progression picker."""
+    backend = _backend(workbook)
+    if backend is not None:
+        return _sql_progression_players(workbook.path, workbook.version, n_default, backend)
+    return _progression_players(workbook.path, workbook.version, n_default, progression(workbook))
+
+
+@shared()
+def _rating_features(version, _players, _elo):
+    return ratings.rating_features(_players, _elo)
+
+
+@shared(max_entries=32)
+def _rating_table(version, formula, weights, _players, _elo):
+    # Only the blend is recomputed when the weights or formula change; the
+    # per-game features come from their own per-version cache.
+    return ratings.rate(_rating_features(version, _players, _elo), dict(weights), formula)
+
+
+def player_ratings_table(workbook, weights=None, formula="Min-max blend"):
+    """Rating features plus a 0-1 "Rating" column (see calciatori.ratings)."""
+    weights = ratings.DEFAULT_WEIGHTS if weights is None else weights
+    return _rating_table(
+        workbook.version, formula, tuple(sorted(weights.items())),
+        player_stats(workbook), player_elo(workbook),
+    )
+
+
+@shared()
+def _top_boards(version, n, _players):
+    return boards.top_boards(_players, boards.BOARDS, n)
+
+
+@shared()
+def _sql_top_boards(path, version, n, _backend):
+    return _backend.top_boards(boards.BOARDS, n)
+
+
+def top_boards(workbook, n=boards.TOP_N):
+    """{title: top-``n`` DataFrame} for every board in calciatori.boards.BOARDS."""
+    backend = _backend(workbook)
+    if backend is not None and not workbook.parts:
+        return _sql_top_boards(workbook.path, workbook.version, n, backend)
+    return _top_boards(workbook.version, n, player_stats(workbook))
+
+
+@shared()
+def _match_index(path, version, _lineups, _matches):
+    return MatchIndex(_lineups, _matches)
+
+
+def match_index(workbook):
+    """Match ID -> lineup index and match summary (see calciatori.matches)."""
+    return _match_index(workbook.path, workbook.version, workbook.lineups, workbook.matches)
+
+
+def match_dates(workbook):
+    """Date of every match, indexed by Match ID, most recent first."""
+    return match_index(workbook).dates()
+
+
+@shared()
+def _latest_match_id(version, _lineups):
+    dates = pd.to_datetime(_lineups["Date"]).to_numpy()
+    ids = _lineups["Match ID"].to_numpy()
+    latest = dates == dates.max()
+    return int(ids[latest].max())
+
+
+def latest_match_id(workbook):
+    """Match ID of the most recent match (highest ID on the latest date)."""
+    return _latest_match_id(workbook.version, workbook.lineups)
+
+
+def match_lineup(workbook, match_id):
+    """Rows of the Lineups sheet for one match."""
+    return match_index(workbook).lineup(match_id)
+
+
+@shared()
+def _last_match_players(version, _lineups, match_id):
+    names = _lineups.loc[_lineups["Match ID"] == match_id, "Player Name"]
+    return sorted(names.dropna().astype(str).str.strip().unique())
+
+
+def last_match_players(workbook):
+    """Names in the lineup of the most recent match."""
+    return _last_match_players(workbook.version, workbook.lineups, latest_match_id(workbook))
+
+
+@shared(max_entries=8)
+def _export(version, fmt, players, _workbook):
+    sheets = export.export_sheets(
+        player_stats(_workbook), _workbook.matches, _workbook.lineups,
+        player_pairings(_workbook), players,
+    )
+    return export.export_bytes(sheets, fmt)
+
+
+def export_data(workbook, fmt="xlsx", players=None):
+    """Bytes of an export of ``workbook`` (see calciatori.export).
+
+    Generated from the current tables, optionally for a subset of
+    ``players``, and cached per data version: downloading again before the
+    data changes does not regenerate the file.
+    """
+    players = None if players is None else tuple(sorted(players))
+    return _export(workbook.version, fmt, players, workbook)
+
+
+def _squad_path(path):
+    return os.path.join(snapshot.snapshot_dir(path), SQUAD_FILE)
+
+
+def saved_squad(workbook):
+    """Names saved with save_squad(), or [] if none were saved."""
+    try:
+        with open(_squad_path(workbook.path), encoding="utf-8") as f:
+            return list(json.load(f))
+    except (OSError, ValueError, TypeError):
+        return []
+
+
+def save_squad(workbook, names):
+    """Remember ``names`` as the squad for the next team generation."""
+    path = _squad_path(workbook.path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(list(names), f)
+    os.replace(tmp, path)
+
+
+def invalidate_cache():
+    """Drop every cached table so the next load_workbook() re-reads the file."""
+    _file_digest.clear()
+    _parse_workbook.clear()
+    _parse_upload.clear()
+    _with_entries.clear()
+    _players_table.clear()
+    _season_totals.clear()
+    _all_time_players_table.clear()
+    _all_time_workbook.clear()
+    _player_aggregator.clear()
+    _pairing_matrix.clear()
+    _pairing_aggregator.clear()
+    _elo_tables.clear()
+    _elo_engine.clear()
+    _progression_table.clear()
+    _progression_aggregator.clear()
+    _progression_players.clear()
+    _rating_features.clear()
+    _rating_table.clear()
+    _top_boards.clear()
+    _match_index.clear()
+    _latest_match_id.clear()
+    _last_match_players.clear()
+    _export.clear()
+    _sql_backend.clear()
+    _synced_backend.clear()
+    _sql_players_table.clear()
+    _sql_pairing_matrix.clear()
+    _sql_progression.clear()
+    _sql_progression_players.clear()
+    _sql_top_boards.clear()
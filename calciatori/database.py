@@ -0,0 +1,317 @@
+"""Optional SQLite backend for the dashboard's aggregations.
+
+The Team Lineups, Matches and Players sheets are mirrored into a SQLite file
+in the workbook's snapshot directory, with indexes on Player Name, Match ID
+and Date. Leaderboards, top-N boards, progression and pairings are then
+queries against it rather than pandas operations over the full tables:
+
+* the Players totals are one ``GROUP BY``, and each top-N board is an
+  ``ORDER BY ... LIMIT n`` over them
+* progression is a window ``SUM() OVER (PARTITION BY player ...)`` that
+  only reads the rows of the selected players, through the
+  (player, date, match) index
+* pairings are a self-join on the (match, team) index
+
+``SqlBackend`` is a ``MatchAggregator``: a new data version only inserts
+the rows of new Match IDs, and the per-match fingerprints are stored in the
+database so that after a restart only matches added since are inserted.
+The rows and fingerprints of a version are written in one transaction, so
+a crash never leaves rows behind without the fingerprints that account for
+them.
+
+SQLite ships with Python, so enabling it (``CALCIATORI_BACKEND=sqlite``, see
+calciatori.data) needs no extra dependency.
+"""
+import os
+import sqlite3
+
+import pandas as pd
+
+from calciatori.pairings import to_matrix
+from calciatori.stats import COUNT_COLUMNS, PROGRESSION_COLUMNS, MatchAggregator, players_table
+
+DATABASE_FILE = "calciatori.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lineups (
+    match_id INTEGER NOT NULL,
+    date TEXT,
+    player_name TEXT NOT NULL,
+    team TEXT,
+    team_score INTEGER,
+    team_conceded INTEGER,
+    result TEXT,
+    goals INTEGER,
+    assists INTEGER,
+    own_goals INTEGER
+);
+CREATE INDEX IF NOT EXISTS lineups_player ON lineups (player_name, date, match_id);
+CREATE INDEX IF NOT EXISTS lineups_match ON lineups (match_id, team);
+CREATE INDEX IF NOT EXISTS lineups_date ON lineups (date);
+
+CREATE TABLE IF NOT EXISTS matches (
+    match_id INTEGER NOT NULL,
+    date TEXT,
+    goals_a INTEGER,
+    goals_b INTEGER,
+    mvp TEXT
+);
+CREATE INDEX IF NOT EXISTS matches_match ON matches (match_id);
+CREATE INDEX IF NOT EXISTS matches_date ON matches (date);
+
+CREATE TABLE IF NOT EXISTS roster (player_name TEXT PRIMARY KEY);
+
+CREATE TABLE IF NOT EXISTS match_fingerprints (
+    match_id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL
+);
+
+-- Views are recreated on every connect, so they always match this module.
+DROP VIEW IF EXISTS player_stats;
+DROP VIEW IF EXISTS player_totals;
+
+-- Additive totals, like stats.aggregate_lineups: MVP awards are counted by
+-- name from the Matches sheet.
+CREATE VIEW player_totals AS
+SELECT
+    player_name AS "Player Name",
+    SUM(played) AS "Match Played",
+    SUM(team_score) AS "Total Goals Scored",
+    SUM(team_conceded) AS "Total Goals Conceded",
+    SUM(won) AS "Games Won",
+    SUM(drew) AS "Games Drew",
+    SUM(lost) AS "Games Lost",
+    SUM(goals) AS "Goal Scored",
+    SUM(assists) AS "Assists",
+    SUM(mvp) AS "MVP",
+    SUM(own_goals) AS "Own Goals"
+FROM (
+    SELECT player_name, 1 AS played, team_score, team_conceded,
+           result = 'Win' AS won, result = 'Draw' AS drew, result = 'Loss' AS lost,
+           goals, assists, 0 AS mvp, own_goals
+    FROM lineups
+    UNION ALL
+    SELECT mvp, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0
+    FROM matches WHERE mvp IS NOT NULL
+)
+GROUP BY player_name;
+
+CREATE VIEW player_stats AS
+SELECT
+    *,
+    "Total Goals Scored" - "Total Goals Conceded" AS "Goal Difference",
+    1.0 * "Games Won" / "Match Played" AS "% Win",
+    1.0 * "Games Lost" / "Match Played" AS "% Lost",
+    1.0 * "Goal Scored" / "Match Played" AS "Goal/Game",
+    1.0 * "MVP" / "Match Played" AS "MVP/Game"
+FROM player_totals
+WHERE "Match Played" > 0;
+"""
+
+# Running totals of the progression table (stats.PROGRESSION_TOTALS).
+_PROGRESSION_SQL = """
+SELECT
+    match_id AS "Match ID",
+    date AS "Date",
+    player_name AS "Player Name",
+    team AS "Team (A/B)",
+    result AS "Result",
+    goals AS "Goals Scored",
+    assists AS "Assists",
+    COUNT(*) OVER w AS "Match Played",
+    SUM(goals) OVER w AS "Cumulative Goal Scored",
+    SUM(assists) OVER w AS "Cumulative Assists",
+    SUM(result = 'Win') OVER w AS "Cumulative Wins",
+    SUM(result = 'Loss') OVER w AS "Cumulative Losses"
+FROM lineups
+WHERE player_name IN ({placeholders})
+WINDOW w AS (PARTITION BY player_name ORDER BY date, match_id, rowid ROWS UNBOUNDED PRECEDING)
+ORDER BY player_name, date, match_id, rowid
+"""
+
+_PAIRS_SQL = """
+SELECT
+    a.player_name AS "Player",
+    b.player_name AS "Other",
+    SUM(a.team = b.team) AS together,
+    SUM(a.team <> b.team) AS against,
+    SUM(a.team = b.team AND a.result = 'Win') AS won_together
+FROM lineups a JOIN lineups b ON a.match_id = b.match_id
+GROUP BY a.player_name, b.player_name
+"""
+
+# Player names in order of their first lineup (pairings.first_appearance_order).
+_FIRST_APPEARANCE_SQL = """
+SELECT l.player_name
+FROM lineups l
+JOIN (SELECT player_name, MIN(match_id) AS first_match FROM lineups GROUP BY player_name) f
+  ON l.player_name = f.player_name AND l.match_id = f.first_match
+GROUP BY l.player_name
+ORDER BY f.first_match, MIN(l.rowid)
+"""
+
+
+def _counts(s):
+    return pd.to_numeric(s, errors="coerce").fillna(0).astype("int64").to_numpy()
+
+
+def _text(s):
+    values = s.astype(object)
+    return values.where(values.notna(), None).to_numpy()
+
+
+def _names(s):
+    return s.astype(str).str.strip().to_numpy()
+
+
+def _dates(s):
+    return _text(pd.to_datetime(s).dt.strftime("%Y-%m-%d"))
+
+
+class SqlBackend(MatchAggregator):
+    """Lineups and matches mirrored into SQLite and queried there."""
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # One connection shared by the sessions' threads, serialised by the
+        # aggregator's lock.
+        self._con = sqlite3.connect(db_path, check_same_thread=False)
+        self._con.executescript(_SCHEMA)
+        self._resume = True
+        super().__init__()
+
+    def _reset_state(self):
+        if self._resume:
+            # Pick up where the database file left off.
+            self._resume = False
+            stored = self._con.execute("SELECT match_id, fingerprint FROM match_fingerprints").fetchall()
+            self.fingerprints = pd.Series(
+                [int(fp) for _, fp in stored], index=[m for m, _ in stored], dtype="uint64"
+            )
+            return
+        # Committed by update(), together with the rows that replace these.
+        for table in ("lineups", "matches", "match_fingerprints"):
+            self._con.execute(f"DELETE FROM {table}")
+
+    def _add(self, lineups_df, matches_df):
+        rows = zip(
+            lineups_df["Match ID"].astype("int64").to_numpy().tolist(),
+            _dates(lineups_df["Date"]),
+            _names(lineups_df["Player Name"]),
+            _text(lineups_df["Team (A/B)"]),
+            _counts(lineups_df["Team Score"]).tolist(),
+            _counts(lineups_df["Team Conceded"]).tolist(),
+            _text(lineups_df["Result"]),
+            _counts(lineups_df["Goals Scored"]).tolist(),
+            _counts(lineups_df["Assists"]).tolist(),
+            _counts(lineups_df["Own Goals"]).tolist(),
+        )
+        self._con.executemany("INSERT INTO lineups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        if matches_df is not None and len(matches_df):
+            mvp = matches_df["MVP"].astype(object)
+            mvp = mvp.where(mvp.isna(), mvp.astype(str).str.strip())
+            self._con.executemany("INSERT INTO matches VALUES (?, ?, ?, ?, ?)", zip(
+                matches_df["Match ID"].astype("int64").to_numpy().tolist(),
+                _dates(matches_df["Date"]),
+                _counts(matches_df["Goals Team A"]).tolist(),
+                _counts(matches_df["Goals Team B"]).tolist(),
+                _text(mvp),
+            ))
+
+    def update(self, lineups_df, matches_df=None, roster=None):
+        with self._lock:
+            try:
+                super().update(lineups_df, matches_df)
+                # uint64 fingerprints do not fit SQLite integers; stored as text.
+                self._con.execute("DELETE FROM match_fingerprints")
+                self._con.executemany(
+                    "INSERT INTO match_fingerprints VALUES (?, ?)",
+                    ((int(m), str(int(fp))) for m, fp in self.fingerprints.items()),
+                )
+                if roster is not None:
+                    self._con.execute("DELETE FROM roster")
+                    self._con.executemany(
+                        "INSERT OR IGNORE INTO roster VALUES (?)",
+                        ((name,) for name in pd.Series(roster, dtype=object).dropna().astype(str).str.strip()),
+                    )
+                self._con.commit()
+            except BaseException:
+                self._con.rollback()
+                # Back to what the database file holds.
+                self._resume = True
+                self.reset()
+                raise
+        return self
+
+    def nbytes(self):
+        # The rows live in the database file; what the process holds of them
+        # is SQLite's page cache, at most cache_size pages (negative: KiB).
+        with self._lock:
+            page_size, = self._con.execute("PRAGMA page_size").fetchone()
+            page_count, = self._con.execute("PRAGMA page_count").fetchone()
+            cache_size, = self._con.execute("PRAGMA cache_size").fetchone()
+        cache = -cache_size * 1024 if cache_size < 0 else cache_size * page_size
+        return super().nbytes() + min(page_count * page_size, cache)
+
+    def query(self, sql, params=()):
+        with self._lock:
+            return pd.read_sql_query(sql, self._con, params=params)
+
+    def players_table(self):
+        """Players table (stats.PLAYERS_COLUMNS), totals summed in SQL."""
+        columns = ", ".join(f'"{c}"' for c in COUNT_COLUMNS)
+        totals = self.query(
+            f'SELECT "Player Name", {columns} FROM player_totals ORDER BY "Player Name"'
+        ).set_index("Player Name")
+        roster = self.query("SELECT player_name FROM roster")["player_name"]
+        return players_table(totals, roster)
+
+    def top_boards(self, boards, n):
+        """{board title: top-``n`` DataFrame}, each one ``ORDER BY ... LIMIT``."""
+        results = {}
+        for board in boards:
+            columns = ", ".join(f'"{c}"' for c in board.columns)
+            df = self.query(
+                f'SELECT {columns} FROM player_stats '
+                f'WHERE "Match Played" >= ? AND "{board.sort_by}" IS NOT NULL '
+                f'ORDER BY "{board.sort_by}" DESC, "Player Name" LIMIT ?',
+                (board.min_played, n),
+            )
+            for col in board.rounded:
+                df[col] = df[col].round(2)
+            results[board.title] = df
+        return results
+
+    def progression(self, players):
+        """Progression rows (stats.PROGRESSION_COLUMNS) of ``players`` only."""
+        players = list(players)
+        if not players:
+            df = pd.DataFrame(columns=PROGRESSION_COLUMNS)
+        else:
+            sql = _PROGRESSION_SQL.format(placeholders=", ".join("?" * len(players)))
+            df = self.query(sql, players)
+        df["Date"] = pd.to_datetime(df["Date"])
+        return df[PROGRESSION_COLUMNS]
+
+    def progression_players(self, n):
+        """(all players, top ``n`` scorers), like data.progression_players."""
+        everyone = self.query("SELECT DISTINCT player_name FROM lineups ORDER BY player_name")
+        leaders = self.query(
+            "SELECT player_name, SUM(goals) AS goals FROM lineups "
+            "GROUP BY player_name ORDER BY goals DESC, player_name LIMIT ?", (n,),
+        )
+        return everyone["player_name"].tolist(), leaders["player_name"].tolist()
+
+    def pair_counts(self):
+        """Sparse pair counts, as pairings.pair_counts."""
+        return self.query(_PAIRS_SQL).set_index(["Player", "Other"]).astype("int64")
+
+    def pairing_matrix(self, kind="together"):
+        """Dense pairing matrix for one ``kind``, players in first-appearance order."""
+        order = pd.Index(self.query(_FIRST_APPEARANCE_SQL)["player_name"])
+        return to_matrix(self.pair_counts(), kind, order)
+
+    def close(self):
+        with self._lock:
+            self._con.close()
+
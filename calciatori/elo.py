@@ -0,0 +1,177 @@
+"""Team-based Elo ratings computed match by match from the lineups.
+
+Unlike the season-aggregate "Rating", Elo accounts for who each player beat:
+before every match each side's strength is the mean Elo of its players, and
+after it every player on a side moves by the same amount,
+
+    delta = K * margin(goal difference) * (result - expected)
+
+with ``expected = 1 / (1 + 10 ** ((opponents - own) / 400))`` and result 1 /
+0.5 / 0 for a win / draw / loss. The margin multiplier follows the World
+Football Elo ratings (1 for a one-goal game, 1.5 for two, (11 + n) / 8 for n
+goals beyond that).
+
+``EloEngine`` keeps the ratings and the full per-player history, applies only
+new matches on ``update()`` (one update each) and can be saved to / loaded
+from JSON so the state survives restarts.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from calciatori.stats import MatchAggregator
+
+INITIAL_ELO = 1500.0
+
+HISTORY_COLUMNS = ["Match ID", "Date", "Player Name", "Team (A/B)", "Elo", "Elo Change"]
+
+_RESULT_SCORE = {"Win": 1.0, "Draw": 0.5, "Loss": 0.0}
+
+
+def margin_multiplier(goal_difference):
+    gd = abs(int(goal_difference))
+    if gd <= 1:
+        return 1.0
+    if gd == 2:
+        return 1.5
+    return (11 + gd) / 8
+
+
+def expected_score(own, opponents):
+    return 1.0 / (1.0 + 10 ** ((opponents - own) / 400.0))
+
+
+class EloEngine(MatchAggregator):
+    """Per-player Elo, updated incrementally in Match ID order."""
+
+    ordered = True
+
+    def __init__(self, k=32.0, initial=INITIAL_ELO, use_margin=True):
+        self.k = float(k)
+        self.initial = float(initial)
+        self.use_margin = bool(use_margin)
+        super().__init__()
+
+    @property
+    def params(self):
+        return {"k": self.k, "initial": self.initial, "use_margin": self.use_margin}
+
+    def _reset_state(self):
+        self.ratings = {}
+        self.games = {}
+        self._history = []
+
+    def _add(self, lineups_df, matches_df):
+        df = pd.DataFrame({
+            "Match ID": lineups_df["Match ID"].to_numpy(),
+            "Date": pd.to_datetime(lineups_df["Date"]).to_numpy(),
+            "Player Name": lineups_df["Player Name"].astype(str).str.strip().to_numpy(),
+            "Team": lineups_df["Team (A/B)"].astype(str).to_numpy(),
+            "Team Score": pd.to_numeric(lineups_df["Team Score"], errors="coerce").to_numpy(),
+            "Team Conceded": pd.to_numeric(lineups_df["Team Conceded"], errors="coerce").to_numpy(),
+            "Result": lineups_df["Result"].astype(str).to_numpy(),
+        }).sort_values("Match ID", kind="stable")
+        # One slice per match; Python only loops over matches, not rows.
+        match_ids = df["Match ID"].to_numpy()
+        bounds = np.flatnonzero(np.diff(match_ids)) + 1
+        starts = np.concatenate([[0], bounds])
+        ends = np.concatenate([bounds, [len(df)]])
+        cols = {c: df[c].to_numpy() for c in df.columns}
+        for start, end in zip(starts, ends):
+            self._apply_match({c: v[start:end] for c, v in cols.items()})
+
+    def _apply_match(self, rows):
+        in_a = rows["Team"] == "A"
+        in_b = rows["Team"] == "B"
+        if not in_a.any() or not in_b.any():
+            return  # incomplete lineup, nothing to compare against
+        players_a = rows["Player Name"][in_a]
+        players_b = rows["Player Name"][in_b]
+        elo_a = np.mean([self.ratings.get(p, self.initial) for p in players_a])
+        elo_b = np.mean([self.ratings.get(p, self.initial) for p in players_b])
+
+        result_a = _RESULT_SCORE.get(rows["Result"][in_a][0])
+        if result_a is None:
+            return
+        delta = self.k * (result_a - expected_score(elo_a, elo_b))
+        if self.use_margin:
+            gd = rows["Team Score"][in_a][0] - rows["Team Conceded"][in_a][0]
+            delta *= margin_multiplier(0 if np.isnan(gd) else gd)
+
+        match_id = int(rows["Match ID"][0])
+        date = rows["Date"][0]
+        for team, players, change in (("A", players_a, delta), ("B", players_b, -delta)):
+            for p in players:
+                new = self.ratings.get(p, self.initial) + change
+                self.ratings[p] = new
+                self.games[p] = self.games.get(p, 0) + 1
+                self._history.append((match_id, date, p, team, new, change))
+
+    def table(self):
+        """Current Elo per player, highest first."""
+        with self._lock:
+            df = pd.DataFrame({
+                "Player Name": list(self.ratings),
+                "Elo": list(self.ratings.values()),
+                "Rated Games": [self.games[p] for p in self.ratings],
+            })
+        return df.sort_values("Elo", ascending=False, ignore_index=True)
+
+    def history(self):
+        """One row per player per match with the Elo after that match."""
+        with self._lock:
+            df = pd.DataFrame(self._history, columns=HISTORY_COLUMNS)
+        df["Date"] = pd.to_datetime(df["Date"])
+        return df
+
+    # --- persistence -----------------------------------------------------
+
+    def to_state(self):
+        with self._lock:
+            return {
+                "params": self.params,
+                "fingerprints": {str(k): int(v) for k, v in self.fingerprints.items()},
+                "ratings": self.ratings,
+                "games": self.games,
+                "history": [
+                    [m, pd.Timestamp(d).isoformat(), p, t, float(e), float(c)]
+                    for m, d, p, t, e, c in self._history
+                ],
+            }
+
+    @classmethod
+    def from_state(cls, state):
+        engine = cls(**state["params"])
+        fps = state["fingerprints"]
+        engine.fingerprints = pd.Series(
+            [int(v) for v in fps.values()], index=[int(k) for k in fps], dtype="uint64"
+        )
+        engine.ratings = {p: float(r) for p, r in state["ratings"].items()}
+        engine.games = {p: int(g) for p, g in state["games"].items()}
+        engine._history = [
+            (int(m), pd.Timestamp(d).to_datetime64(), p, t, e, c)
+            for m, d, p, t, e, c in state["history"]
+        ]
+        return engine
+
+    def save(self, path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_state(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, **params):
+        """Engine saved at ``path``, or a fresh one if it is missing, unreadable
+        or was computed with different ``params``."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            engine = cls.from_state(state)
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls(**params)
+        if params and engine.params != cls(**params).params:
+            return cls(**params)
+        return engine
@@ -0,0 +1,257 @@
+"""Matches entered from the app, kept in an append-only log next to the workbook.
+
+Each entered match is one JSON line in ``CALCIATORI_RDG.entries.jsonl``::
+
+    {"match_id": 51, "date": "2026-08-20", "score_a": 6, "score_b": 4,
+     "mvp": "Musta", "players": [{"name": "Musta", "team": "A", "goals": 3,
+     "assists": 1, "own_goals": 0}, ...]}
+
+A logged match is removed by appending ``{"remove": 51}``; the log itself
+is only ever appended to.
+
+The workbook itself is never rewritten. On load the logged matches are
+appended to its Matches and Team Lineups sheets, in the same layout, so the
+incremental aggregators only see new Match IDs. A match whose Match ID is
+already in the workbook (e.g. it was later typed into the Excel file too) is
+skipped: the workbook wins.
+
+Parsed lines are compacted into Parquet files in the workbook's snapshot
+directory together with the size and SHA-1 of the log prefix they cover, so
+each load only parses lines appended since the last compaction. If that
+prefix no longer matches (the log was edited by hand), the whole log is
+parsed again.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import date
+
+import pandas as pd
+
+from calciatori.snapshot import (
+    LINEUPS_SHEET, MATCHES_SHEET, WorkbookError, apply_schema, snapshot_dir,
+)
+
+ENTRIES_SUFFIX = ".entries.jsonl"
+
+_COMPACTED = {
+    LINEUPS_SHEET: "entries_lineups.parquet",
+    MATCHES_SHEET: "entries_matches.parquet",
+}
+_COMPACTED_MANIFEST = "entries.json"
+
+LINEUP_COLUMNS = [
+    "Match ID", "Date", "Player Name", "Team (A/B)", "Team Score", "Team Conceded",
+    "Result", "Goals Scored", "Assists", "Own Goals", "Unique Team ID",
+]
+MATCH_COLUMNS = ["Match ID", "Date", "Team", "Score", "Goals Team A", "Goals Team B", "MVP"]
+
+_append_lock = threading.Lock()
+
+
+class EntriesError(WorkbookError):
+    """A line of the entries log is not a valid entry or removal."""
+
+
+def entries_path(path):
+    """Log file of the matches entered for the workbook at ``path``."""
+    root, _ = os.path.splitext(os.path.abspath(path))
+    return root + ENTRIES_SUFFIX
+
+
+def validate_entry(entry, existing_ids=()):
+    """Raise ValueError if ``entry`` is not a complete, new match."""
+    match_id = int(entry["match_id"])
+    if match_id in set(existing_ids):
+        raise ValueError(f"Match {match_id} already exists")
+    date.fromisoformat(str(entry["date"]))
+    players = entry["players"]
+    names = [str(p["name"]).strip() for p in players]
+    if any(not n for n in names):
+        raise ValueError("Every lineup row needs a player name")
+    teams = {p["team"] for p in players}
+    if not teams <= {"A", "B"}:
+        raise ValueError("Team must be A or B")
+    if teams != {"A", "B"}:
+        raise ValueError("Both teams need at least one player")
+    seen = set()
+    for name, p in zip(names, players):
+        if (name, p["team"]) in seen:
+            raise ValueError(f"{name} is listed twice for team {p['team']}")
+        seen.add((name, p["team"]))
+        if min(int(p.get("goals", 0)), int(p.get("assists", 0)), int(p.get("own_goals", 0))) < 0:
+            raise ValueError(f"Negative numbers for {name}")
+    if min(int(entry["score_a"]), int(entry["score_b"])) < 0:
+        raise ValueError("Scores can't be negative")
+
+
+def add_match(path, entry, existing_ids=()):
+    """Validate ``entry`` and append it to the log of the workbook at ``path``.
+
+    ``existing_ids`` are the Match IDs already in the workbook; IDs already
+    in the log are checked too, under the same lock as the append. The line
+    is written with a single append, so concurrent writers never interleave.
+    """
+    with _append_lock:
+        logged = load_entries(path)[1]["Match ID"].astype(int)
+        validate_entry(entry, set(existing_ids) | set(logged))
+        _append(path, entry)
+
+
+def remove_match(path, match_id):
+    """Remove logged match ``match_id`` by appending a removal line.
+
+    Raises ValueError if it was not entered in the app: matches in the
+    workbook are edited there.
+    """
+    match_id = int(match_id)
+    with _append_lock:
+        logged = load_entries(path)[1]["Match ID"].astype(int)
+        if match_id not in set(logged):
+            raise ValueError(f"Match {match_id} was not entered in the app")
+        _append(path, {"remove": match_id})
+
+
+def _append(path, record):
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with open(entries_path(path), "a", encoding="utf-8") as f:
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def entry_rows(entries):
+    """(lineups, matches) DataFrames, in the sheets' layout, for ``entries``."""
+    lineups, matches = [], []
+    for e in entries:
+        match_id, day = int(e["match_id"]), pd.Timestamp(e["date"])
+        score = {"A": int(e["score_a"]), "B": int(e["score_b"])}
+        for p in e["players"]:
+            team = p["team"]
+            other = "B" if team == "A" else "A"
+            result = ("Win" if score[team] > score[other]
+                      else "Loss" if score[team] < score[other] else "Draw")
+            lineups.append((
+                match_id, day, str(p["name"]).strip(), team, score[team], score[other], result,
+                int(p.get("goals", 0)), int(p.get("assists", 0)), int(p.get("own_goals", 0)),
+                f"{match_id}_{team}",
+            ))
+        matches.append((
+            match_id, day, "Team A vs Team B", f"{score['A']}-{score['B']}",
+            score["A"], score["B"], e.get("mvp") or None,
+        ))
+    return (
+        apply_schema(LINEUPS_SHEET, pd.DataFrame(lineups, columns=LINEUP_COLUMNS)),
+        apply_schema(MATCHES_SHEET, pd.DataFrame(matches, columns=MATCH_COLUMNS)),
+    )
+
+
+def _parse_lines(log, data, offset):
+    """The records in ``data[offset:]``, up to its last complete line.
+
+    Raises EntriesError, naming the line, for anything that is not an entry
+    validate_entry() accepts or a removal.
+    """
+    # Ignore a partly written last line; it is picked up on the next load.
+    end = data.rfind(b"\n") + 1
+    records = []
+    first = data.count(b"\n", 0, offset) + 1
+    for number, line in enumerate(data[offset:end].split(b"\n")[:-1], start=first):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if isinstance(record, dict) and set(record) == {"remove"}:
+                record = {"remove": int(record["remove"])}
+            else:
+                validate_entry(record)
+        except (ValueError, KeyError, TypeError) as exc:
+            raise EntriesError(
+                f"{os.path.basename(log)}, line {number}: not a valid match entry ({exc})"
+            ) from exc
+        records.append(record)
+    return records, max(end, offset)
+
+
+def _read_compacted(directory):
+    try:
+        with open(os.path.join(directory, _COMPACTED_MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        log_size, log_sha1 = int(manifest["log_size"]), str(manifest["log_sha1"])
+        frames = {sheet: pd.read_parquet(os.path.join(directory, name))
+                  for sheet, name in _COMPACTED.items()}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None, 0, None
+    return frames, log_size, log_sha1
+
+
+def _write_compacted(directory, frames, log_size, log_sha1):
+    os.makedirs(directory, exist_ok=True)
+    for sheet, name in _COMPACTED.items():
+        target = os.path.join(directory, name)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        frames[sheet].to_parquet(tmp, index=False)
+        os.replace(tmp, target)
+    target = os.path.join(directory, _COMPACTED_MANIFEST)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"log_size": log_size, "log_sha1": log_sha1}, f)
+    os.replace(tmp, target)
+
+
+def load_entries(path):
+    """(lineups, matches) of every logged match for the workbook at ``path``.
+
+    Reads the compacted Parquet files plus any lines appended since, and
+    compacts again when there were new lines. Raises EntriesError if a line
+    of the log is invalid.
+    """
+    log = entries_path(path)
+    empty = entry_rows([])
+    if not os.path.exists(log):
+        return empty
+    with open(log, "rb") as f:
+        data = f.read()
+    directory = snapshot_dir(path)
+    frames, offset, prefix_sha1 = _read_compacted(directory)
+    if (frames is None or offset > len(data)
+            or hashlib.sha1(data[:offset]).hexdigest() != prefix_sha1):
+        frames, offset = {LINEUPS_SHEET: empty[0], MATCHES_SHEET: empty[1]}, 0
+    records, end = _parse_lines(log, data, offset)
+    if records:
+        # Removals drop the matches logged before them: from the compacted
+        # frames, which precede every new line, and from the new entries.
+        removed, added = set(), []
+        for record in records:
+            if "remove" in record:
+                removed.add(record["remove"])
+                added = [e for e in added if int(e["match_id"]) != record["remove"]]
+            else:
+                added.append(record)
+        new_lineups, new_matches = entry_rows(added)
+        frames = {
+            sheet: pd.concat(
+                [frames[sheet][~frames[sheet]["Match ID"].isin(removed)], new], ignore_index=True
+            )
+            for sheet, new in ((LINEUPS_SHEET, new_lineups), (MATCHES_SHEET, new_matches))
+        }
+        try:
+            _write_compacted(directory, frames, end, hashlib.sha1(data[:end]).hexdigest())
+        except OSError:
+            pass  # read-only deployment: replay the log next time
+    return (apply_schema(LINEUPS_SHEET, frames[LINEUPS_SHEET]),
+            apply_schema(MATCHES_SHEET, frames[MATCHES_SHEET]))
+
+
+def merge_entries(lineups_df, matches_df, logged_lineups, logged_matches):
+    """The sheets with the logged matches not already in them appended."""
+    known = set(lineups_df["Match ID"].dropna().astype(int)) | set(matches_df["Match ID"].dropna().astype(int))
+    keep_lineups = ~logged_lineups["Match ID"].isin(known)
+    keep_matches = ~logged_matches["Match ID"].isin(known)
+    if not keep_lineups.any() and not keep_matches.any():
+        return lineups_df, matches_df
+    return (
+        apply_schema(LINEUPS_SHEET, pd.concat([lineups_df, logged_lineups[keep_lineups]], ignore_index=True)),
+        apply_schema(MATCHES_SHEET, pd.concat([matches_df, logged_matches[keep_matches]], ignore_index=True)),
+    )
@@ -0,0 +1,90 @@
+"""Downloadable exports built from the live tables.
+
+Instead of handing out the source .xlsx, the export is generated from the
+tables the dashboard shows: the Players table derived from the lineups, the
+Matches and Team Lineups sheets including matches entered in the app (see
+calciatori.entries), and the "together" pairing matrix in place of the
+hand-kept Sheet2. The sheet names and columns are the source workbook's, so
+an exported workbook can be uploaded back into the dashboard.
+
+Formats (``EXPORT_FORMATS``):
+
+* ``xlsx``    - one workbook, written with openpyxl's write-only mode, which
+  streams rows to the file instead of building every cell in memory
+* ``csv``     - a zip with one CSV per sheet
+* ``parquet`` - a zip with one Parquet file per sheet, dtypes preserved
+
+Each sheet is written straight into its zip member, without an intermediate
+copy of the file.
+"""
+import io
+import zipfile
+
+import openpyxl
+import pandas as pd
+
+from calciatori.snapshot import LINEUPS_SHEET, MATCHES_SHEET, PAIRINGS_SHEET, PLAYERS_SHEET
+
+# format -> (label, file extension, MIME type)
+EXPORT_FORMATS = {
+    "xlsx": ("Excel workbook", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("CSV files (zip)", "zip", "application/zip"),
+    "parquet": ("Parquet files (zip)", "zip", "application/zip"),
+}
+
+
+def export_sheets(players_df, matches_df, lineups_df, pairing_df, players=None):
+    """{sheet name: DataFrame} to export, limited to ``players`` if given.
+
+    With a player subset, the Team Lineups rows are those players' own rows
+    and the Matches sheet keeps the matches they played in.
+    """
+    if players is not None:
+        players = pd.Index(players)
+        lineups_df = lineups_df[lineups_df["Player Name"].astype(str).str.strip().isin(players)]
+        matches_df = matches_df[matches_df["Match ID"].isin(lineups_df["Match ID"])]
+        players_df = players_df[players_df["Player Name"].isin(players)]
+        pairing_df = pairing_df.loc[pairing_df.index.isin(players), pairing_df.columns.isin(players)]
+    return {
+        PLAYERS_SHEET: players_df,
+        MATCHES_SHEET: matches_df,
+        LINEUPS_SHEET: lineups_df,
+        PAIRINGS_SHEET: pairing_df.rename_axis("Player Name").reset_index(),
+    }
+
+
+def write_xlsx(sheets, target):
+    """Write ``sheets`` to ``target`` (a path or binary file) as one workbook."""
+    wb = openpyxl.Workbook(write_only=True)
+    for name, df in sheets.items():
+        ws = wb.create_sheet(name)
+        ws.append([str(col) for col in df.columns])
+        # Blank cells for NaN/NaT, as in the source workbook.
+        values = df.astype(object).where(df.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            ws.append(row)
+    wb.save(target)
+
+
+def write_zip(sheets, target, fmt="csv"):
+    """Write ``sheets`` to ``target`` as a zip of one ``fmt`` file per sheet."""
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, df in sheets.items():
+            with zf.open(f"{name}.{fmt}", "w") as member:
+                if fmt == "csv":
+                    with io.TextIOWrapper(member, encoding="utf-8", newline="") as text:
+                        df.to_csv(text, index=False)
+                else:
+                    df.to_parquet(member, index=False)
+
+
+def export_bytes(sheets, fmt="xlsx"):
+    """The export of ``sheets`` in format ``fmt`` (see EXPORT_FORMATS)."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; choose from {list(EXPORT_FORMATS)}")
+    buffer = io.BytesIO()
+    if fmt == "xlsx":
+        write_xlsx(sheets, buffer)
+    else:
+        write_zip(sheets, buffer, fmt)
+    return buffer.getvalue()
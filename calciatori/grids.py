@@ -0,0 +1,65 @@
+"""AgGrid options shared by every table in the dashboards.
+
+Grid options only depend on a table's column names and dtypes (its schema)
+and on the layout it is shown with, never on its rows. ``grid_options()``
+builds them once per (schema, profile) with ``st.cache_data``, so reruns and
+other sessions reuse them and the cost of setting up grids does not grow
+with the number of tables on the page.
+
+A layout profile is an entry in ``GRID_PROFILES``:
+
+* ``leaderboard`` - the full General Leaderboard: column filters, pagination
+* ``top``         - the small top-N boards: sortable only
+"""
+import json
+
+import pandas as pd
+import streamlit as st
+from st_aggrid import GridOptionsBuilder
+
+GRID_PROFILES = {
+    "leaderboard": {"filter": True, "pagination": True},
+    "top": {"filter": False, "pagination": False},
+}
+
+
+def grid_schema(df):
+    """Hashable ((column, dtype), ...) description of ``df``'s columns."""
+    return tuple((str(col), str(dtype)) for col, dtype in df.dtypes.items())
+
+
+@st.cache_data(show_spinner=False)
+def grid_options(schema, profile="top"):
+    """AgGrid options for a table with columns ``schema`` in layout ``profile``."""
+    if profile not in GRID_PROFILES:
+        raise ValueError(f"Unknown grid profile {profile!r}; choose from {list(GRID_PROFILES)}")
+    layout = GRID_PROFILES[profile]
+    frame = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in schema})
+
+    gb = GridOptionsBuilder.from_dataframe(frame)
+    gb.configure_default_column(editable=False, sortable=True, filter=layout["filter"])
+    if layout["pagination"]:
+        gb.configure_pagination(enabled=True)
+
+    # Force scrollable layout
+    gb.configure_grid_options(domLayout='normal')
+    gb.configure_grid_options(suppressHorizontalScroll=False)
+
+    # Minimum column width (so they don't shrink) and alignment
+    for i, col in enumerate(frame.columns):
+        if i == 0:
+            gb.configure_column(col, minWidth=150, cellStyle={'textAlign': 'left'})
+        else:
+            gb.configure_column(col, minWidth=120, cellStyle={'textAlign': 'center'})
+
+    options = gb.build()
+    # Disable auto-sizing completely
+    options['suppressAutoSize'] = True
+    options['suppressSizeToFit'] = True
+    # The builder nests defaultdicts, which st.cache_data cannot pickle.
+    return json.loads(json.dumps(options))
+
+
+def grid_options_for(df, profile="top"):
+    """Cached AgGrid options for ``df`` (see grid_options)."""
+    return grid_options(grid_schema(df), profile)
@@ -0,0 +1,96 @@
+"""Per-match index over the Lineups and Matches sheets, for the match browser.
+
+The lineups are sorted by Match ID once (stably, so each match keeps its
+sheet order) and the first/last row of every match is recorded, so one
+Giornata's lineup is a dict lookup plus a slice rather than a scan of the
+whole table. The one-row-per-match summary used by the paginated history
+listing is built from the same sorted rows, newest match first.
+"""
+import numpy as np
+import pandas as pd
+
+from calciatori import store
+
+SUMMARY_COLUMNS = ["Match ID", "Date", "Score", "Winner", "Top Scorer", "MVP"]
+
+
+def _goals_by_side(lineups, side):
+    on_side = lineups["Team (A/B)"].astype(str).to_numpy() == side
+    score = pd.Series(lineups["Team Score"].to_numpy(dtype=float), index=lineups.index).where(on_side)
+    return score.groupby(lineups["Match ID"].to_numpy(), sort=True).max()
+
+
+class MatchIndex:
+    """Match ID -> lineup rows, plus a per-match summary table."""
+
+    def __init__(self, lineups_df, matches_df=None):
+        order = np.argsort(lineups_df["Match ID"].to_numpy(), kind="stable")
+        self.lineups = lineups_df.iloc[order].reset_index(drop=True)
+        ids = self.lineups["Match ID"].to_numpy()
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else np.array([], dtype=int)
+        ends = np.r_[starts[1:], len(ids)]
+        self._rows = {int(m): (int(s), int(e)) for m, s, e in zip(ids[starts], starts, ends)}
+        self.summary = self._summarize(starts, matches_df)
+
+    def nbytes(self):
+        """Approximate memory held by the index (see calciatori.store.nbytes)."""
+        return sum(store.nbytes(v) for v in vars(self).values())
+
+    def _summarize(self, starts, matches_df):
+        lineups = self.lineups
+        if lineups.empty:
+            return pd.DataFrame(columns=SUMMARY_COLUMNS)
+        match_ids = lineups["Match ID"].to_numpy()[starts]
+        goals_a = _goals_by_side(lineups, "A").reindex(match_ids).to_numpy()
+        goals_b = _goals_by_side(lineups, "B").reindex(match_ids).to_numpy()
+
+        goals = pd.to_numeric(lineups["Goals Scored"], errors="coerce").fillna(0)
+        # Rows are 0..n-1 after sorting, so idxmax labels are row positions.
+        best = goals.groupby(lineups["Match ID"].to_numpy(), sort=True).idxmax().to_numpy()
+        top_scorer = np.where(
+            goals.to_numpy()[best] > 0, lineups["Player Name"].astype(str).to_numpy()[best], ""
+        )
+
+        if matches_df is not None and not matches_df.empty:
+            mvp = matches_df.drop_duplicates("Match ID").set_index("Match ID")["MVP"]
+            mvp = mvp.astype(object).reindex(match_ids).fillna("").astype(str).to_numpy()
+        else:
+            mvp = np.full(len(match_ids), "")
+
+        def fmt(goals):
+            return np.where(np.isnan(goals), "?", np.nan_to_num(goals).astype(np.int64).astype(str))
+
+        summary = pd.DataFrame({
+            "Match ID": match_ids,
+            "Date": pd.to_datetime(lineups["Date"]).to_numpy()[starts],
+            "Score": np.char.add(np.char.add(fmt(goals_a), "-"), fmt(goals_b)),
+            "Winner": np.select(
+                [goals_a > goals_b, goals_b > goals_a, goals_a == goals_b],
+                ["Team A", "Team B", "Draw"], default="",
+            ),
+            "Top Scorer": top_scorer,
+            "MVP": mvp,
+        })
+        return summary.sort_values(["Date", "Match ID"], ascending=False, ignore_index=True)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, match_id):
+        return int(match_id) in self._rows
+
+    def lineup(self, match_id):
+        """Lineup rows of one match (empty if the Match ID is unknown)."""
+        start, end = self._rows.get(int(match_id), (0, 0))
+        return self.lineups.iloc[start:end]
+
+    def dates(self):
+        """Date of every match, indexed by Match ID, most recent first."""
+        return self.summary.set_index("Match ID")["Date"]
+
+    def n_pages(self, per_page):
+        return max(1, -(-len(self.summary) // per_page))
+
+    def page(self, number, per_page=20):
+        """Summary rows on page ``number`` (0-based) of the history, newest first."""
+        return self.summary.iloc[number * per_page:(number + 1) * per_page]
@@ -0,0 +1,94 @@
+"""Player x player co-occurrence matrices computed from the lineups.
+
+Replaces the hand-maintained "Sheet2" grid. Each team sheet (same Match ID,
+same "Team (A/B)") contributes one count to every pair of its players, which
+is the sparse product ``M.T @ M`` of the team x player incidence matrix; it is
+computed by enumerating only the pairs that actually occur (a self-join on
+Match ID, ~150 rows per match) and accumulating them in long (COO) form, so
+cost grows with games played rather than with roster size squared.
+
+Three variants are produced:
+
+* ``together``      - times on the same team (diagonal: games played)
+* ``against``       - times on opposite teams of the same match
+* ``won_together``  - wins on the same team (diagonal: games won)
+"""
+import numpy as np
+import pandas as pd
+
+from calciatori.stats import MatchAggregator
+
+PAIRING_KINDS = ("together", "against", "won_together")
+
+
+def _empty_counts():
+    index = pd.MultiIndex.from_arrays([[], []], names=["Player", "Other"])
+    return pd.DataFrame(columns=list(PAIRING_KINDS), index=index, dtype="int64")
+
+
+def pair_counts(lineups_df):
+    """Sparse pair counts: one row per (Player, Other) pair that co-occurred."""
+    if lineups_df.empty:
+        return _empty_counts()
+    rows = pd.DataFrame({
+        "Match ID": lineups_df["Match ID"].to_numpy(),
+        "Team": lineups_df["Team (A/B)"].astype(str).to_numpy(),
+        "Player": lineups_df["Player Name"].astype(str).str.strip().to_numpy(),
+        "Win": (lineups_df["Result"] == "Win").to_numpy(),
+    })
+    pairs = rows.merge(rows, on="Match ID", suffixes=("", " other"))
+    same_team = pairs["Team"].to_numpy() == pairs["Team other"].to_numpy()
+    counts = pd.DataFrame({
+        "Player": pairs["Player"],
+        "Other": pairs["Player other"],
+        "together": same_team.astype("int64"),
+        "against": (~same_team).astype("int64"),
+        "won_together": (same_team & pairs["Win"].to_numpy()).astype("int64"),
+    })
+    return counts.groupby(["Player", "Other"], sort=False).sum()
+
+
+def first_appearance_order(lineups_df):
+    """Player names in order of their first lineup, like the Sheet2 layout."""
+    names = lineups_df.sort_values("Match ID", kind="stable")["Player Name"]
+    return pd.Index(names.astype(str).str.strip().unique())
+
+
+def to_matrix(counts, kind="together", players=None):
+    """Dense square DataFrame for one pairing ``kind`` from sparse ``counts``."""
+    if kind not in PAIRING_KINDS:
+        raise ValueError(f"kind must be one of {PAIRING_KINDS}, got {kind!r}")
+    if players is None:
+        players = counts.index.get_level_values("Player").unique()
+    players = pd.Index(players)
+    n = len(players)
+    matrix = np.zeros(n * n, dtype="int64")
+    i = players.get_indexer(counts.index.get_level_values("Player"))
+    j = players.get_indexer(counts.index.get_level_values("Other"))
+    ok = (i >= 0) & (j >= 0)
+    np.add.at(matrix, i[ok] * n + j[ok], counts[kind].to_numpy()[ok])
+    return pd.DataFrame(matrix.reshape(n, n), index=players, columns=players)
+
+
+def pairing_matrix(lineups_df, kind="together"):
+    """One-shot pairing matrix in first-appearance player order."""
+    return to_matrix(pair_counts(lineups_df), kind, first_appearance_order(lineups_df))
+
+
+class PairingAggregator(MatchAggregator):
+    """Pair counts for all three kinds, updated incrementally per new match."""
+
+    def _reset_state(self):
+        self.counts = _empty_counts()
+        self.players = pd.Index([])
+
+    def _add(self, lineups_df, matches_df):
+        delta = pair_counts(lineups_df)
+        self.counts = self.counts.add(delta, fill_value=0).astype("int64")
+        self.players = self.players.append(
+            first_appearance_order(lineups_df).difference(self.players, sort=False)
+        )
+
+    def matrix(self, kind="together"):
+        with self._lock:
+            return to_matrix(self.counts, kind, self.players)
@@ -0,0 +1,104 @@
+"""Player rating model used by the team generator.
+
+Split in two stages so each can be cached on its own key:
+
+1. ``rating_features()`` turns the Players table into per-game features.
+   It only depends on the data, so it is cached per data version.
+2. A rating formula blends those features into a single 0-1 "Rating"
+   using a weight per feature. It is cached per (data version, formula,
+   weights), so changing the weights never recomputes the features.
+
+Formulas are plain functions ``(features, weights) -> Series`` registered
+in ``RATING_FORMULAS`` with ``@rating_formula("Name")``.
+"""
+import numpy as np
+import pandas as pd
+
+from calciatori.elo import INITIAL_ELO
+
+# The original hard-coded blend.
+DEFAULT_WEIGHTS = {
+    "Goals per Game": 0.35,
+    "Assists per Game": 0.25,
+    "Win Rate": 0.25,
+    "MVP per Game": 0.15,
+}
+FEATURES = list(DEFAULT_WEIGHTS)
+
+RATING_FORMULAS = {}
+
+
+def rating_formula(name):
+    """Register a ``(features, weights) -> Series`` rating formula."""
+    def register(func):
+        RATING_FORMULAS[name] = func
+        return func
+    return register
+
+
+def rating_features(players_df, elo_table=None):
+    """Per-game features for every player in the Players table.
+
+    With an ``elo_table`` (see calciatori.elo) an "Elo" column is added too;
+    players without a rated game get the starting Elo.
+    """
+    df = players_df[["Player Name"]].copy()
+    df["Match Played"] = players_df["Match Played"].fillna(0)
+    mp_safe = df["Match Played"].replace(0, np.nan)  # avoid divide-by-zero
+    df["Goals per Game"] = (players_df["Goal Scored"] / mp_safe).fillna(0)
+    df["Assists per Game"] = (players_df["Assists"] / mp_safe).fillna(0)
+    df["MVP per Game"] = players_df["MVP/Game"].fillna(0)
+    df["Win Rate"] = players_df["% Win"].fillna(0)
+    if elo_table is not None:
+        elo = elo_table.set_index("Player Name")["Elo"]
+        df["Elo"] = df["Player Name"].astype(str).map(elo).fillna(INITIAL_ELO)
+    return df
+
+
+def _normalize(s):
+    lo, hi = s.min(), s.max()
+    if hi - lo < 1e-9:
+        return pd.Series(0.5, index=s.index)
+    return (s - lo) / (hi - lo)
+
+
+def _percentile(s):
+    if s.nunique() < 2:
+        return pd.Series(0.5, index=s.index)
+    return (s.rank(method="average") - 1) / (len(s) - 1)
+
+
+def _weighted_blend(features, weights, scale):
+    weights = {f: w for f, w in weights.items() if w}
+    total = sum(weights.values())
+    if total <= 0:
+        return pd.Series(0.5, index=features.index)
+    return sum(w / total * scale(features[f]) for f, w in weights.items())
+
+
+@rating_formula("Min-max blend")
+def minmax_blend(features, weights):
+    """Weighted sum of features each min-max scaled to 0-1 (the original model)."""
+    return _weighted_blend(features, weights, _normalize)
+
+
+@rating_formula("Percentile blend")
+def percentile_blend(features, weights):
+    """Weighted sum of percentile ranks; less swayed by one-game outliers."""
+    return _weighted_blend(features, weights, _percentile)
+
+
+@rating_formula("Elo")
+def elo_rating(features, weights):
+    """Match-by-match Elo scaled to 0-1; the feature weights are not used."""
+    return _normalize(features["Elo"])
+
+
+def rate(features, weights=None, formula="Min-max blend"):
+    """``features`` plus a "Rating" column computed by ``formula``."""
+    weights = DEFAULT_WEIGHTS if weights is None else weights
+    if formula not in RATING_FORMULAS:
+        raise ValueError(f"Unknown rating formula {formula!r}; choose from {list(RATING_FORMULAS)}")
+    df = features.copy()
+    df["Rating"] = RATING_FORMULAS[formula](features, weights)
+    return df
@@ -0,0 +1,76 @@
+"""Seasons as partitions of the dataset.
+
+Each season is its own workbook, and therefore has its own snapshot and its
+own cached tables. The current season is the main data file. Past seasons
+live in ``SEASONS_DIR``, one workbook per season named after it
+(``seasons/2024-25.xlsx``). A view of one season only loads that season's
+partition.
+
+"All time" is the seasons stacked oldest first, with Match IDs renumbered
+so they carry on from the previous season. Each partition comes from its own
+cache, and the all-time Players table is summed from the per-season totals,
+so adding a season never re-parses or re-aggregates the others.
+"""
+import os
+
+import pandas as pd
+
+from calciatori.snapshot import LINEUPS_SHEET, MATCHES_SHEET, PAIRINGS_SHEET, PLAYERS_SHEET
+
+SEASONS_DIR = "seasons"
+
+CURRENT_SEASON = "Current season"
+ALL_TIME = "All time"
+
+_WORKBOOK_EXTENSIONS = (".xlsx", ".xlsm")
+
+
+def discover_seasons(current_file, seasons_dir=SEASONS_DIR):
+    """{season label: workbook path}, oldest season first, current last."""
+    seasons = {}
+    if os.path.isdir(seasons_dir):
+        for name in sorted(os.listdir(seasons_dir)):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() in _WORKBOOK_EXTENSIONS and not name.startswith("~$"):
+                seasons[stem] = os.path.join(seasons_dir, name)
+    seasons[CURRENT_SEASON] = current_file
+    return seasons
+
+
+def all_time_path(current_file):
+    """Stand-in path for the all-time dataset.
+
+    Caches and saved state (Elo, squad) are keyed on a workbook path, and the
+    all-time dataset keeps its own next to the current season's.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(current_file)), "all_time")
+
+
+def combine_sheets(parts):
+    """One dataset from the sheets of several seasons, oldest first.
+
+    Each season's Match IDs are shifted past the previous season's highest,
+    so they stay unique. The roster is the union of the seasons' rosters.
+    The hand-maintained pairing grid is per season and is left empty.
+    """
+    offset = 0
+    lineups, matches = [], []
+    for sheets in parts:
+        season_lineups = sheets[LINEUPS_SHEET].copy()
+        season_matches = sheets[MATCHES_SHEET].copy()
+        season_lineups["Match ID"] += offset
+        season_matches["Match ID"] += offset
+        ids = pd.concat([season_lineups["Match ID"], season_matches["Match ID"]])
+        if ids.notna().any():
+            offset = int(ids.max())
+        lineups.append(season_lineups)
+        matches.append(season_matches)
+
+    roster = pd.concat([sheets[PLAYERS_SHEET] for sheets in parts], ignore_index=True)
+    roster["Player Name"] = roster["Player Name"].astype(object)
+    return {
+        PLAYERS_SHEET: roster.drop_duplicates("Player Name", keep="last", ignore_index=True),
+        MATCHES_SHEET: pd.concat(matches, ignore_index=True),
+        LINEUPS_SHEET: pd.concat(lineups, ignore_index=True),
+        PAIRINGS_SHEET: pd.DataFrame(),
+    }
@@ -0,0 +1,319 @@
+"""Columnar (Parquet) snapshot compiled from the Excel workbook.
+
+openpyxl parsing dominates startup time, so the workbook is compiled once
+into a directory of Parquet files next to it (``CALCIATORI_RDG.snapshot/``)
+with a typed schema: dates as datetime64, counts as int32, names as
+categoricals. A ``manifest.json`` records the snapshot format version and the
+SHA-1 of the source workbook; the snapshot is stale (and ignored) as soon as
+either no longer matches.
+
+Build it ahead of time with::
+
+    python -m calciatori.snapshot [CALCIATORI_RDG.xlsx]
+
+or let the apps compile it on demand the first time they load a new file.
+"""
+import hashlib
+import json
+import os
+import sys
+import zipfile
+from datetime import datetime, timezone
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+# Bump whenever the schema below or the on-disk layout changes, so snapshots
+# written by an older version are rebuilt instead of misread.
+SNAPSHOT_VERSION = 1
+
+MANIFEST = "manifest.json"
+
+PLAYERS_SHEET = "Players"
+MATCHES_SHEET = "Matches"
+LINEUPS_SHEET = "Team Lineups"
+PAIRINGS_SHEET = "Sheet2"
+SHEETS = (PLAYERS_SHEET, MATCHES_SHEET, LINEUPS_SHEET, PAIRINGS_SHEET)
+
+_FILE_NAMES = {
+    PLAYERS_SHEET: "players.parquet",
+    MATCHES_SHEET: "matches.parquet",
+    LINEUPS_SHEET: "lineups.parquet",
+    PAIRINGS_SHEET: "sheet2.parquet",
+}
+
+# column -> logical type. Columns not listed keep whatever pandas inferred.
+SCHEMA = {
+    PLAYERS_SHEET: {
+        "Player Name": "name",
+        "Match Played": "count",
+        "Total Goals Scored": "count",
+        "Total Goals Conceded": "count",
+        "Goal Difference": "count",
+        "Games Won": "count",
+        "Games Drew": "count",
+        "Games Lost": "count",
+        "Goal Scored": "count",
+        "Assists": "count",
+        "MVP": "count",
+        "Own Goals": "count",
+        "% Win": "ratio",
+        "% Lost": "ratio",
+        "Goal/Game": "ratio",
+        "MVP/Game": "ratio",
+    },
+    MATCHES_SHEET: {
+        "Match ID": "count",
+        "Date": "date",
+        "Team": "name",
+        "Goals Team A": "count",
+        "Goals Team B": "count",
+        "MVP": "name",
+    },
+    LINEUPS_SHEET: {
+        "Match ID": "count",
+        "Date": "date",
+        "Player Name": "name",
+        "Team (A/B)": "name",
+        "Team Score": "count",
+        "Team Conceded": "count",
+        "Result": "name",
+        # Blank cells mean "none that match", so they become 0 rather than NaN.
+        "Goals Scored": "count",
+        "Assists": "count",
+        "Own Goals": "count",
+        "Unique Team ID": "name",
+    },
+    PAIRINGS_SHEET: {
+        # Row labels; stray numeric cells below the matrix would otherwise
+        # leave a mixed str/int column that Parquet cannot store.
+        "Unnamed: 0": "label",
+    },
+}
+
+
+# Columns the dashboards need, checked when a workbook is parsed from an
+# upload. Other columns are optional.
+REQUIRED_COLUMNS = {
+    PLAYERS_SHEET: ("Player Name",),
+    MATCHES_SHEET: ("Match ID", "Date", "MVP"),
+    LINEUPS_SHEET: (
+        "Match ID", "Date", "Player Name", "Team (A/B)", "Team Score", "Team Conceded",
+        "Result", "Goals Scored", "Assists", "Own Goals",
+    ),
+}
+
+
+_KEY_COLUMNS = {"Match ID": "count", "Date": "date"}
+
+
+class WorkbookError(ValueError):
+    """The workbook does not have the sheets or columns the apps expect."""
+
+
+def _coerce(s, kind):
+    if kind == "count":
+        return pd.to_numeric(s, errors="coerce").fillna(0).astype("int32")
+    if kind == "ratio":
+        return pd.to_numeric(s, errors="coerce").astype("float64")
+    if kind == "date":
+        return pd.to_datetime(s, errors="coerce")
+    if kind == "name":
+        return s.astype("category")
+    if kind == "label":
+        return s.where(s.isna(), s.astype(str))
+    raise ValueError(f"Unknown column type {kind!r}")
+
+
+def apply_schema(sheet_name, df):
+    """Return ``df`` with the typed schema for ``sheet_name`` applied."""
+    df = df.copy()
+    # Parquet needs string column labels (Sheet2 has numeric header cells).
+    df.columns = [str(c) for c in df.columns]
+    for col, kind in SCHEMA.get(sheet_name, {}).items():
+        if col in df.columns:
+            df[col] = _coerce(df[col], kind)
+    return df
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_excel_sheets(path):
+    """Parse every sheet of the workbook in one pass, typed per SCHEMA."""
+    with pd.ExcelFile(path, engine="openpyxl") as xls:
+        sheets = pd.read_excel(xls, sheet_name=list(SHEETS))
+    return {name: apply_schema(name, df) for name, df in sheets.items()}
+
+
+def _header_names(header):
+    names = []
+    for i, cell in enumerate(header):
+        name = f"Unnamed: {i}" if cell is None else str(cell)
+        # Same de-duplication as pandas: "x", "x.1", ...
+        base, n = name, 1
+        while name in names:
+            name, n = f"{base}.{n}", n + 1
+        names.append(name)
+    return names
+
+
+def _check_cell(sheet_name, row_number, col, kind, value):
+    if value is None:
+        return
+    if kind == "count" and not isinstance(value, (int, float)):
+        raise WorkbookError(f"{sheet_name} row {row_number}: {col!r} should be a number, got {value!r}")
+    if kind == "date" and not isinstance(value, datetime):
+        raise WorkbookError(f"{sheet_name} row {row_number}: {col!r} should be a date, got {value!r}")
+
+
+def _stream_sheet(ws, sheet_name):
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        raise WorkbookError(f"Sheet {sheet_name!r} is empty")
+    columns = _header_names(header)
+    missing = [c for c in REQUIRED_COLUMNS.get(sheet_name, ()) if c not in columns]
+    if missing:
+        raise WorkbookError(f"Sheet {sheet_name!r} is missing columns: {', '.join(missing)}")
+
+    # Only the keys every table is built on are checked cell by cell; stray
+    # text in a count column (a note typed into a cell) is coerced to 0, as
+    # for the snapshot.
+    checks = [(columns.index(c), c, kind) for c, kind in _KEY_COLUMNS.items()
+              if c in REQUIRED_COLUMNS.get(sheet_name, ())]
+    width = len(columns)
+    records = []
+    for row_number, row in enumerate(rows, start=2):
+        if all(v is None for v in row):
+            continue
+        row = tuple(row[:width]) + (None,) * (width - len(row))
+        for i, col, kind in checks:
+            _check_cell(sheet_name, row_number, col, kind, row[i])
+        records.append(row)
+    df = pd.DataFrame.from_records(records, columns=columns).infer_objects()
+    # Blank columns come out as None; read_excel gives NaN.
+    for col in df.columns[df.isna().all().to_numpy()]:
+        df[col] = np.nan
+    return apply_schema(sheet_name, df)
+
+
+def read_excel_stream(source):
+    """Parse a workbook (path or file-like, e.g. an upload's BytesIO) with
+    openpyxl in read-only mode, row by row, typed per SCHEMA.
+
+    Required sheets and columns are checked from the header rows, and
+    number/date cells as they stream past, so a wrong file fails on its
+    first bad row without being loaded whole. Raises WorkbookError.
+    """
+    try:
+        wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile) as exc:
+        raise WorkbookError(f"Not a readable .xlsx workbook ({exc})") from exc
+    try:
+        missing = [name for name in REQUIRED_COLUMNS if name not in wb.sheetnames]
+        if missing:
+            raise WorkbookError(f"Missing sheets: {', '.join(missing)}")
+        sheets = {}
+        for name in SHEETS:
+            if name in wb.sheetnames:
+                sheets[name] = _stream_sheet(wb[name], name)
+            else:
+                sheets[name] = pd.DataFrame()
+        return sheets
+    finally:
+        wb.close()
+
+
+def snapshot_dir(path):
+    """Directory holding the snapshot of the workbook at ``path``."""
+    root, _ = os.path.splitext(os.path.abspath(path))
+    return root + ".snapshot"
+
+
+def _read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(path, digest):
+    """True if a snapshot for ``path`` exists and was built from ``digest``."""
+    manifest = _read_manifest(snapshot_dir(path))
+    return (
+        manifest is not None
+        and manifest.get("snapshot_version") == SNAPSHOT_VERSION
+        and manifest.get("source_sha1") == digest
+    )
+
+
+def read_snapshot(path, digest):
+    """Load the snapshot sheets, or None if it is missing or stale."""
+    if not is_fresh(path, digest):
+        return None
+    directory = snapshot_dir(path)
+    try:
+        return {
+            name: pd.read_parquet(os.path.join(directory, fname))
+            for name, fname in _FILE_NAMES.items()
+        }
+    except (OSError, ValueError):
+        # Half-written or corrupt snapshot: treat as stale.
+        return None
+
+
+def write_snapshot(path, sheets, digest):
+    """Write ``sheets`` as the snapshot of ``path`` built from ``digest``.
+
+    Each file is written to a temporary name and moved into place; the
+    manifest goes last, so readers never see a fresh manifest pointing at
+    old data.
+    """
+    directory = snapshot_dir(path)
+    os.makedirs(directory, exist_ok=True)
+    for name, fname in _FILE_NAMES.items():
+        target = os.path.join(directory, fname)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        sheets[name].to_parquet(tmp, index=False)
+        os.replace(tmp, target)
+    manifest = {
+        "snapshot_version": SNAPSHOT_VERSION,
+        "source": os.path.basename(path),
+        "source_sha1": digest,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "sheets": {name: fname for name, fname in _FILE_NAMES.items()},
+    }
+    target = os.path.join(directory, MANIFEST)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, target)
+    return directory
+
+
+def build_snapshot(path, force=False):
+    """Compile the workbook at ``path`` into its snapshot if it is stale."""
+    digest = file_sha1(path)
+    if not force and is_fresh(path, digest):
+        return snapshot_dir(path)
+    return write_snapshot(path, read_excel_sheets(path), digest)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    force = "--force" in argv
+    paths = [a for a in argv if a != "--force"] or ["CALCIATORI_RDG.xlsx"]
+    for p in paths:
+        print(f"{p} -> {build_snapshot(p, force=force)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""Per-player season statistics derived from the Team Lineups sheet.
+
+This replaces the spreadsheet's formula-driven "Players" sheet: every count is
+built from ``lineups_df`` (MVP awards from ``matches_df``) with a single
+groupby, and ``PlayerAggregator`` keeps running totals so that appending new
+Match IDs only aggregates the new rows. ``MatchAggregator`` is the shared
+incremental-update machinery, also used for the pairing matrices.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from calciatori import store
+
+# Additive per-player totals. Everything else in the Players table is derived
+# from these, so they are all that needs to be kept between updates.
+COUNT_COLUMNS = [
+    "Match Played",
+    "Total Goals Scored",
+    "Total Goals Conceded",
+    "Games Won",
+    "Games Drew",
+    "Games Lost",
+    "Goal Scored",
+    "Assists",
+    "MVP",
+    "Own Goals",
+]
+
+# Column order of the original "Players" sheet (minus the unused Position).
+PLAYERS_COLUMNS = [
+    "Player Name",
+    "Match Played",
+    "Total Goals Scored",
+    "Total Goals Conceded",
+    "Goal Difference",
+    "Games Won",
+    "Games Drew",
+    "Games Lost",
+    "% Win",
+    "% Lost",
+    "Goal Scored",
+    "Goal/Game",
+    "Assists",
+    "MVP",
+    "MVP/Game",
+    "Own Goals",
+]
+
+_FINGERPRINT_COLUMNS = [
+    "Player Name", "Team (A/B)", "Team Score", "Team Conceded", "Result",
+    "Goals Scored", "Assists", "Own Goals",
+]
+
+
+def _count(s):
+    return pd.to_numeric(s, errors="coerce").fillna(0)
+
+
+def _empty_totals():
+    return pd.DataFrame(
+        columns=COUNT_COLUMNS, index=pd.Index([], name="Player Name"), dtype="int64"
+    )
+
+
+def aggregate_lineups(lineups_df, matches_df=None):
+    """Per-player additive totals (COUNT_COLUMNS) for the given lineup rows."""
+    if lineups_df.empty:
+        return _empty_totals()
+    names = lineups_df["Player Name"].astype(str).str.strip()
+    result = lineups_df["Result"]
+    rows = pd.DataFrame({
+        "Player Name": names,
+        "Match Played": 1,
+        "Total Goals Scored": _count(lineups_df["Team Score"]),
+        "Total Goals Conceded": _count(lineups_df["Team Conceded"]),
+        "Games Won": (result == "Win").astype("int64"),
+        "Games Drew": (result == "Draw").astype("int64"),
+        "Games Lost": (result == "Loss").astype("int64"),
+        "Goal Scored": _count(lineups_df["Goals Scored"]),
+        "Assists": _count(lineups_df["Assists"]),
+        "MVP": 0,
+        "Own Goals": _count(lineups_df["Own Goals"]),
+    })
+    if matches_df is not None and "MVP" in matches_df.columns:
+        # Like the sheet's COUNTIF, MVP awards are counted by name from the
+        # Matches sheet; they are stacked under the lineup rows so a single
+        # groupby still produces every column.
+        mvps = matches_df["MVP"].dropna().astype(str).str.strip()
+        mvp_rows = pd.DataFrame(0, index=range(len(mvps)), columns=COUNT_COLUMNS)
+        mvp_rows["Player Name"] = mvps.to_numpy()
+        mvp_rows["MVP"] = 1
+        rows = pd.concat([rows, mvp_rows], ignore_index=True)
+    return rows.groupby("Player Name", sort=False).sum()[COUNT_COLUMNS]
+
+
+def players_table(totals, roster=None):
+    """Full Players table (PLAYERS_COLUMNS) from additive ``totals``.
+
+    ``roster`` is an optional list of names that should appear even with no
+    games played, as in the spreadsheet's Players sheet.
+    """
+    totals = totals[COUNT_COLUMNS]
+    # Names that never played (e.g. a misspelt MVP) are only kept if they are
+    # on the roster.
+    keep = totals["Match Played"] > 0
+    if roster is not None:
+        # A name listed twice (or on several seasons' rosters) is one player.
+        roster = pd.Index(pd.Series(roster, dtype=object).dropna().astype(str).str.strip().unique())
+        keep |= totals.index.isin(roster)
+        totals = totals[keep]
+        totals = totals.reindex(totals.index.union(roster, sort=False), fill_value=0)
+    else:
+        totals = totals[keep]
+    df = totals.astype("int64")
+    played = df["Match Played"].replace(0, np.nan)  # ratios are NaN with no games
+    df["Goal Difference"] = df["Total Goals Scored"] - df["Total Goals Conceded"]
+    df["% Win"] = df["Games Won"] / played
+    df["% Lost"] = df["Games Lost"] / played
+    df["Goal/Game"] = df["Goal Scored"] / played
+    df["MVP/Game"] = df["MVP"] / played
+    df.index.name = "Player Name"
+    return df.reset_index()[PLAYERS_COLUMNS]
+
+
+def build_players_table(lineups_df, matches_df=None, roster=None):
+    """One-shot equivalent of the spreadsheet's Players sheet."""
+    return players_table(aggregate_lineups(lineups_df, matches_df), roster)
+
+
+def match_fingerprints(lineups_df, matches_df=None):
+    """One hash per Match ID, used to tell appended matches from edited ones."""
+    cols = [c for c in _FINGERPRINT_COLUMNS if c in lineups_df.columns]
+    row_hash = pd.util.hash_pandas_object(lineups_df[cols].astype(str), index=False)
+    fp = row_hash.groupby(lineups_df["Match ID"].to_numpy()).sum()
+    if matches_df is not None and "MVP" in matches_df.columns:
+        mvp_hash = pd.util.hash_pandas_object(matches_df["MVP"].astype(str), index=False)
+        mvp_fp = mvp_hash.groupby(matches_df["Match ID"].to_numpy()).sum()
+        ids = fp.index.union(mvp_fp.index)
+        # uint64 arithmetic wraps around, which is fine for a fingerprint.
+        fp = pd.Series(
+            fp.reindex(ids, fill_value=0).to_numpy(dtype="uint64")
+            + mvp_fp.reindex(ids, fill_value=0).to_numpy(dtype="uint64"),
+            index=ids,
+        )
+    return fp.astype("uint64")
+
+
+class MatchAggregator:
+    """Base for state built from ``lineups_df`` one batch of new Match IDs at a time.
+
+    ``update()`` only hands matches it has not seen before to ``_add()``. If
+    a match it already counted has been edited or removed, it falls back to a
+    full rebuild, so the state always matches the lineups it was given.
+    Subclasses implement ``_reset_state()`` and ``_add()``; those whose
+    result depends on match order set ``ordered = True``, which also forces a
+    rebuild when the new matches do not all come after those already
+    processed (see ``_appends_in_order()``).
+    """
+
+    ordered = False
+
+    def __init__(self):
+        # Re-entrant, so subclasses can hold it around update().
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        self.fingerprints = pd.Series(dtype="uint64")
+        self._reset_state()
+
+    def _reset_state(self):
+        raise NotImplementedError
+
+    def _add(self, lineups_df, matches_df):
+        raise NotImplementedError
+
+    def nbytes(self):
+        """Approximate memory held by the running state (see calciatori.store.nbytes)."""
+        with self._lock:
+            return sum(store.nbytes(v) for v in vars(self).values())
+
+    def _appends_in_order(self, lineups_df, new_ids, seen_ids):
+        """True if matches ``new_ids`` sort after every match already processed."""
+        return new_ids.min() > seen_ids.max()
+
+    def update(self, lineups_df, matches_df=None):
+        with self._lock:
+            fps = match_fingerprints(lineups_df, matches_df)
+            seen = self.fingerprints
+            known = seen.index.intersection(fps.index)
+            if len(known) < len(seen) or (fps[known] != seen[known]).any():
+                self.reset()
+                seen = self.fingerprints
+            new_ids = fps.index.difference(seen.index)
+            if (self.ordered and len(new_ids) and len(seen)
+                    and not self._appends_in_order(lineups_df, new_ids, seen.index)):
+                self.reset()
+                seen = self.fingerprints
+                new_ids = fps.index
+            if len(new_ids):
+                new_matches = None
+                if matches_df is not None:
+                    new_matches = matches_df[matches_df["Match ID"].isin(new_ids)]
+                self._add(lineups_df[lineups_df["Match ID"].isin(new_ids)], new_matches)
+                self.fingerprints = fps
+            return self
+
+
+class PlayerAggregator(MatchAggregator):
+    """Running per-player totals behind the Players table."""
+
+    def _reset_state(self):
+        self.totals = _empty_totals()
+
+    def _add(self, lineups_df, matches_df):
+        delta = aggregate_lineups(lineups_df, matches_df)
+        self.totals = self.totals.add(delta, fill_value=0).astype("int64")
+
+    def current_totals(self):
+        with self._lock:
+            return self.totals.copy()
+
+    def table(self, roster=None):
+        with self._lock:
+            return players_table(self.totals, roster)
+
+
+# --- Match-by-match progression ---------------------------------------------
+
+# cumulative column -> per-match column it accumulates
+PROGRESSION_TOTALS = {
+    "Match Played": "Played",
+    "Cumulative Goal Scored": "Goals Scored",
+    "Cumulative Assists": "Assists",
+    "Cumulative Wins": "Win",
+    "Cumulative Losses": "Loss",
+}
+
+PROGRESSION_COLUMNS = [
+    "Match ID", "Date", "Player Name", "Team (A/B)", "Result",
+    "Goals Scored", "Assists", *PROGRESSION_TOTALS,
+]
+
+
+def progression_table(lineups_df, start=None):
+    """One row per player per match with running totals (PROGRESSION_COLUMNS).
+
+    ``start`` optionally holds each player's totals before these matches
+    (indexed by Player Name, one column per PROGRESSION_TOTALS key), which
+    lets new matches be appended to an existing table.
+    """
+    rows = pd.DataFrame({
+        "Match ID": lineups_df["Match ID"].to_numpy(),
+        "Date": pd.to_datetime(lineups_df["Date"]).to_numpy(),
+        # Stray spaces ("Elliot " vs "Elliot") would split one player in two.
+        "Player Name": lineups_df["Player Name"].astype(str).str.strip().to_numpy(),
+        "Team (A/B)": lineups_df["Team (A/B)"].astype(str).to_numpy(),
+        "Result": lineups_df["Result"].astype(str).to_numpy(),
+        # Blank cells (no goal/assist that match) would poison every running
+        # total after them, so they count as 0.
+        "Goals Scored": _count(lineups_df["Goals Scored"]).to_numpy(),
+        "Assists": _count(lineups_df["Assists"]).to_numpy(),
+    }).sort_values(["Player Name", "Date", "Match ID"], kind="stable", ignore_index=True)
+    rows["Played"] = 1
+    rows["Win"] = (rows["Result"] == "Win").astype("int64")
+    rows["Loss"] = (rows["Result"] == "Loss").astype("int64")
+
+    grp = rows.groupby("Player Name", sort=False)
+    for total, col in PROGRESSION_TOTALS.items():
+        rows[total] = grp[col].cumsum()
+        if start is not None and len(start):
+            rows[total] += rows["Player Name"].map(start[total]).fillna(0).astype(rows[total].dtype)
+    return rows[PROGRESSION_COLUMNS]
+
+
+class ProgressionAggregator(MatchAggregator):
+    """Progression table that new matches are appended to, not rebuilt."""
+
+    ordered = True
+
+    def _reset_state(self):
+        self._chunks = []
+        self.last = pd.DataFrame(columns=list(PROGRESSION_TOTALS), dtype="float64")
+        self.latest_date = None
+
+    def _appends_in_order(self, lineups_df, new_ids, seen_ids):
+        # Running totals follow (Date, Match ID): a new match dated before the
+        # latest one processed (say, entered late) must start from earlier
+        # totals, so it needs a rebuild even with a higher Match ID.
+        if not super()._appends_in_order(lineups_df, new_ids, seen_ids):
+            return False
+        new_dates = pd.to_datetime(lineups_df.loc[lineups_df["Match ID"].isin(new_ids), "Date"])
+        return self.latest_date is None or not (new_dates < self.latest_date).any()
+
+    def _add(self, lineups_df, matches_df):
+        chunk = progression_table(lineups_df, start=self.last)
+        self._chunks.append(chunk)
+        if len(chunk):
+            newest = chunk["Date"].max()
+            self.latest_date = newest if self.latest_date is None else max(self.latest_date, newest)
+        latest = chunk.groupby("Player Name", sort=False)[list(PROGRESSION_TOTALS)].last()
+        self.last = pd.concat([self.last.drop(latest.index, errors="ignore"), latest])
+
+    def table(self):
+        with self._lock:
+            if not self._chunks:
+                return progression_table(self._empty_lineups())
+            if len(self._chunks) > 1:
+                self._chunks = [pd.concat(self._chunks, ignore_index=True)]
+            table = self._chunks[0]
+        return table.sort_values(["Player Name", "Date", "Match ID"], kind="stable", ignore_index=True)
+
+    @staticmethod
+    def _empty_lineups():
+        return pd.DataFrame(columns=[
+            "Match ID", "Date", "Player Name", "Team (A/B)", "Result", "Goals Scored", "Assists",
+        ])
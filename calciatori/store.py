@@ -0,0 +1,191 @@
+"""Process-wide, read-only store for the parsed workbook and derived tables.
+
+``st.cache_data`` unpickles a fresh copy of a cached value for every call,
+so every viewer (and every rerun) holds its own copy of each table. Functions
+decorated with ``@shared`` are cached with ``st.cache_resource`` instead: the
+value is built once per key and the same object is handed to every session.
+Callers must treat these values as read-only; with pandas copy-on-write,
+anything derived from them (filters, column selections) is independent.
+Copy-on-write is only always on from pandas 3, hence ``pandas>=3`` in
+requirements.txt: on pandas 2 an in-place edit in one session could leak
+into the tables every other session sees.
+
+Long-lived objects that are updated in place rather than rebuilt (the
+running aggregators, the SQLite backend) are cached with ``@shared_state``.
+They are sized when the report is made, since their size changes after they
+are first cached.
+
+For host sizing, the store records the size of every shared entry and each
+session notes which entries it used, so ``memory_report()`` can separate
+memory paid once (shared) from memory paid per viewer (session state).
+"""
+import dataclasses
+import functools
+import inspect
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Session-state key holding the shared entries this session has used.
+_SESSION_KEYS = "_shared_store_keys"
+
+
+def nbytes(obj):
+    """Approximate memory held by ``obj``, including DataFrame contents.
+
+    Other objects can report their own size with an ``nbytes()`` method.
+    """
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if callable(getattr(obj, "nbytes", None)):
+        return int(obj.nbytes())
+    if isinstance(obj, dict):
+        return sum(nbytes(k) + nbytes(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sum(nbytes(v) for v in obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return sum(nbytes(getattr(obj, f.name)) for f in dataclasses.fields(obj))
+    return sys.getsizeof(obj)
+
+
+class SharedStore:
+    """Sizes of the live shared entries, keyed by (function, arguments)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # function name -> OrderedDict(key -> bytes)
+        self._live = {}  # function name -> {key: weakref to the object}
+
+    def record(self, name, key, value, max_entries):
+        with self._lock:
+            entries = self._entries.setdefault(name, OrderedDict())
+            if key in entries:
+                entries.move_to_end(key)
+                return
+        size = nbytes(value)
+        with self._lock:
+            entries[key] = size
+            # Mirror the cache's own LRU eviction.
+            while len(entries) > max_entries:
+                entries.popitem(last=False)
+
+    def track(self, name, key, obj):
+        """Keep ``obj`` to be sized when asked, for as long as it is cached."""
+        with self._lock:
+            self._live.setdefault(name, {})[key] = weakref.ref(obj)
+
+    def _live_size(self, name, key):
+        with self._lock:
+            ref = self._live.get(name, {}).get(key)
+        obj = ref() if ref is not None else None
+        return 0 if obj is None else nbytes(obj)
+
+    def size_of(self, name, key):
+        with self._lock:
+            size = self._entries.get(name, {}).get(key)
+        return self._live_size(name, key) if size is None else size
+
+    def forget(self, name):
+        with self._lock:
+            self._entries.pop(name, None)
+            self._live.pop(name, None)
+
+    def table(self):
+        with self._lock:
+            rows = [(name, key, size) for name, entries in self._entries.items()
+                    for key, size in entries.items()]
+            live = [(name, key) for name, refs in self._live.items() for key in refs]
+        rows += [(name, key, self._live_size(name, key)) for name, key in live]
+        return pd.DataFrame(rows, columns=["Table", "Key", "Bytes"])
+
+
+@st.cache_resource(show_spinner=False)
+def shared_store():
+    return SharedStore()
+
+
+def _note_session_use(name, key):
+    st.session_state.setdefault(_SESSION_KEYS, set()).add((name, key))
+
+
+def _store_key(signature, args, kwargs):
+    bound = signature.bind(*args, **kwargs)
+    return repr(tuple(v for k, v in bound.arguments.items() if not k.startswith("_")))
+
+
+def shared(max_entries=8, show_spinner=False):
+    """Decorator: cache a read-only value once for all sessions.
+
+    Like ``st.cache_data``, arguments starting with "_" are not part of the
+    key.
+    """
+    def decorate(func):
+        cached = st.cache_resource(show_spinner=show_spinner, max_entries=max_entries)(func)
+        signature = inspect.signature(func)
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            value = cached(*args, **kwargs)
+            key = _store_key(signature, args, kwargs)
+            shared_store().record(name, key, value, max_entries)
+            _note_session_use(name, key)
+            return value
+
+        def clear():
+            cached.clear()
+            shared_store().forget(name)
+
+        wrapper.clear = clear
+        return wrapper
+    return decorate
+
+
+def shared_state(show_spinner=False):
+    """Decorator: one object per key, shared by all sessions and updated in
+    place (an aggregator, a database connection).
+
+    The object is sized whenever the memory report is made, not once when it
+    is cached like a ``@shared`` value.
+    """
+    def decorate(func):
+        cached = st.cache_resource(show_spinner=show_spinner)(func)
+        signature = inspect.signature(func)
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            value = cached(*args, **kwargs)
+            key = _store_key(signature, args, kwargs)
+            shared_store().track(name, key, value)
+            _note_session_use(name, key)
+            return value
+
+        def clear():
+            cached.clear()
+            shared_store().forget(name)
+
+        wrapper.clear = clear
+        return wrapper
+    return decorate
+
+
+def memory_report():
+    """Bytes held by the shared store in total, by the entries this session
+    uses, and by this session's own state."""
+    store = shared_store()
+    used = st.session_state.get(_SESSION_KEYS, set())
+    own = {k: v for k, v in st.session_state.items() if k != _SESSION_KEYS}
+    return {
+        "shared_total": int(store.table()["Bytes"].sum()),
+        "shared_used": sum(store.size_of(name, key) for name, key in used),
+        "session": nbytes(own),
+    }
@@ -0,0 +1,246 @@
+"""Exact team balancing for the Generatore Squadre.
+
+For the 10-20 players of a match day every possible split can simply be
+enumerated: there are at most C(20, 10) = 184,756 of them, halved to 92,378
+when both teams have the same size (swapping A and B gives the same split).
+Splits are built once per (pool size, team size) as a boolean membership
+matrix from bitmasks, and a whole pool is scored with a single matrix-vector
+product, so finding the best split and the next best alternatives takes a
+few milliseconds.
+
+Match-day rules (``TeamConstraints``) shrink the search space itself rather
+than filtering finished splits: players that must stay together are merged
+into one block before enumerating, and keep-apart pairs, team sizes and the
+goalkeeper spread are checked on the raw bitmasks, so only valid splits are
+ever materialised and scored.
+
+For variety, splits can also be scored on how often their teammates have
+already played together: with a pair-weight matrix W (past games together,
+zero diagonal) and membership matrix M, the repeat count of every split is
+``rowsum((M @ W) * M) / 2`` for each team, one matrix product for all splits.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+# Enumeration is 2**n, so keep it to match-day sized pools.
+MAX_POOL_SIZE = 24
+
+_POPCOUNT_8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class Split(NamedTuple):
+    team_a: list
+    team_b: list
+    sum_a: float
+    sum_b: float
+    # Past games together summed over every pair of teammates, both teams.
+    repeats: float = 0.0
+
+    @property
+    def gap(self):
+        return abs(self.sum_a - self.sum_b)
+
+
+@dataclass(frozen=True)
+class TeamConstraints:
+    # Groups of names that must end up on the same team.
+    together: tuple = ()
+    # Pairs of names that must end up on different teams.
+    apart: tuple = ()
+    # Goalkeepers; they are spread so the two teams' counts differ by at most 1.
+    keepers: tuple = ()
+
+    def __bool__(self):
+        return bool(self.together or self.apart or self.keepers)
+
+
+def _popcount(masks):
+    as_bytes = masks.view(np.uint8).reshape(len(masks), -1)
+    return _POPCOUNT_8[as_bytes].sum(axis=1)
+
+
+@lru_cache(maxsize=32)
+def split_members(n, size_a):
+    """Boolean (n_splits, n) matrix: row i is team A's membership in split i.
+
+    Mirror-image splits are dropped when both teams have the same size, by
+    always putting player 0 in team A.
+    """
+    if n > MAX_POOL_SIZE:
+        raise ValueError(f"Cannot enumerate splits of more than {MAX_POOL_SIZE} players (got {n})")
+    if not 0 <= size_a <= n:
+        raise ValueError(f"Team size {size_a} is not possible with {n} players")
+    masks = np.arange(1 << n, dtype=np.uint32)
+    keep = _popcount(masks) == size_a
+    if 2 * size_a == n:
+        keep &= (masks & 1).astype(bool)
+    masks = masks[keep]
+    members = ((masks[:, None] >> np.arange(n, dtype=np.uint32)) & 1).astype(bool)
+    members.setflags(write=False)
+    return members
+
+
+def _bit(masks, i):
+    return (masks >> np.uint32(i)) & np.uint32(1)
+
+
+def _weighted_popcount(masks, weights):
+    total = np.zeros(len(masks), dtype=np.int64)
+    for i, w in enumerate(weights):
+        if w:
+            total += _bit(masks, i).astype(np.int64) * int(w)
+    return total
+
+
+def _blocks(names, together):
+    """Block id per player, merging keep-together groups (union-find)."""
+    parent = list(range(len(names)))
+    index = {p: i for i, p in enumerate(names)}
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for group in together:
+        members = [index[p] for p in group if p in index]
+        for i in members[1:]:
+            parent[find(i)] = find(members[0])
+    roots = {}
+    return np.array([roots.setdefault(find(i), len(roots)) for i in range(len(names))])
+
+
+def constrained_members(names, size_a, constraints):
+    """Membership matrix of the splits of ``names`` that satisfy ``constraints``.
+
+    Rules naming players outside ``names`` (not playing today) are ignored.
+    Raises ValueError if no split satisfies them.
+    """
+    n = len(names)
+    index = {p: i for i, p in enumerate(names)}
+    block_of = _blocks(names, constraints.together)
+    n_blocks = int(block_of.max()) + 1 if n else 0
+    if n_blocks > MAX_POOL_SIZE:
+        raise ValueError(f"Cannot enumerate splits of more than {MAX_POOL_SIZE} players (got {n})")
+
+    block_sizes = np.bincount(block_of, minlength=n_blocks)
+    keepers = set(constraints.keepers)
+    is_keeper = np.array([p in keepers for p in names], dtype=np.int64)
+    block_keepers = np.bincount(block_of, weights=is_keeper, minlength=n_blocks).astype(np.int64)
+
+    masks = np.arange(1 << n_blocks, dtype=np.uint32)
+    if 2 * size_a == n:
+        # A/B mirror images: block 0 always plays for team A.
+        masks = masks[_bit(masks, 0).astype(bool)]
+    masks = masks[_weighted_popcount(masks, block_sizes) == size_a]
+
+    for pair in constraints.apart:
+        ids = [index[p] for p in pair if p in index]
+        for a, b in zip(ids, ids[1:]):
+            ba, bb = block_of[a], block_of[b]
+            if ba == bb:
+                raise ValueError(f"{names[a]} and {names[b]} must play both together and apart")
+            masks = masks[_bit(masks, ba) != _bit(masks, bb)]
+
+    n_keepers = int(block_keepers.sum())
+    if n_keepers:
+        keepers_a = _weighted_popcount(masks, block_keepers)
+        masks = masks[np.abs(2 * keepers_a - n_keepers) <= 1]
+
+    if not len(masks):
+        raise ValueError("No team split satisfies all the rules for the selected players")
+    block_members = ((masks[:, None] >> np.arange(n_blocks, dtype=np.uint32)) & 1).astype(bool)
+    return block_members[:, block_of]
+
+
+def team_sizes(n):
+    """Even-as-possible split, sizes differ by at most 1 (A gets the extra one)."""
+    size_a = -(-n // 2)  # ceil
+    return size_a, n - size_a
+
+
+def _to_splits(names, values, members, rows, repeats=None):
+    total = values.sum()
+    splits = []
+    for row in rows:
+        in_a = members[row]
+        sum_a = float(values[in_a].sum())
+        splits.append(Split(
+            team_a=[names[i] for i in np.flatnonzero(in_a)],
+            team_b=[names[i] for i in np.flatnonzero(~in_a)],
+            sum_a=sum_a,
+            sum_b=float(total - sum_a),
+            repeats=float(repeats[row]) if repeats is not None else 0.0,
+        ))
+    return splits
+
+
+def _top_k(scores, k):
+    k = min(k, len(scores))
+    rows = np.argpartition(scores, k - 1)[:k]
+    return rows[np.argsort(scores[rows], kind="stable")]
+
+
+def split_gaps(values, members):
+    """Absolute rating gap |A - B| of every split in ``members``."""
+    sums_a = members @ values
+    return np.abs(2 * sums_a - values.sum())
+
+
+def pair_weight_matrix(names, pairings):
+    """Pool x pool array of past games together, from a pairing matrix.
+
+    ``pairings`` is a square DataFrame labelled by player name (e.g. the
+    "together" pairing matrix); players missing from it count as 0.
+    """
+    w = pairings.reindex(index=names, columns=names, fill_value=0).to_numpy(dtype=float)
+    w = np.nan_to_num(w)
+    np.fill_diagonal(w, 0.0)
+    return w
+
+
+def split_repeats(weights, members):
+    """Past games together summed over all teammate pairs of every split."""
+    m = members.astype(float)
+    other = 1.0 - m
+    within_a = ((m @ weights) * m).sum(axis=1)
+    within_b = ((other @ weights) * other).sum(axis=1)
+    return (within_a + within_b) / 2
+
+
+def _rescale(x):
+    span = x.max() - x.min()
+    return (x - x.min()) / span if span > 1e-12 else np.zeros_like(x)
+
+
+def balance_teams(ratings, top_k=10, constraints=None, pairings=None, variety=0.0):
+    """The ``top_k`` most balanced splits of ``ratings`` ({name: rating}).
+
+    The first split is an exact minimum-gap partition (team sizes differ by
+    at most one) among those allowed by ``constraints``; the rest are the
+    next best alternatives, in order.
+
+    With a ``pairings`` matrix and ``variety`` in (0, 1], splits are instead
+    ranked by ``(1 - variety) * gap + variety * repeats``, both rescaled to
+    0-1 over the candidate splits, so teammates who often played together
+    tend to be split up.
+    """
+    names = list(ratings)
+    values = np.array([ratings[p] for p in names], dtype=float)
+    size_a = team_sizes(len(names))[0]
+    if constraints:
+        members = constrained_members(names, size_a, constraints)
+    else:
+        members = split_members(len(names), size_a)
+    scores = split_gaps(values, members)
+    repeats = None
+    if pairings is not None:
+        repeats = split_repeats(pair_weight_matrix(names, pairings), members)
+        if variety > 0:
+            scores = (1 - variety) * _rescale(scores) + variety * _rescale(repeats)
+    rows = _top_k(scores, top_k)
+    return _to_splits(names, values, members, rows, repeats)
@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from calciatori.database import SqlBackend
+
+
+def lineups(*match_ids):
+    return pd.DataFrame([
+        {"Match ID": m, "Date": pd.Timestamp("2025-11-13") + pd.Timedelta(weeks=m),
+         "Player Name": player, "Team (A/B)": team, "Team Score": 1, "Team Conceded": 0,
+         "Result": "Win" if team == "A" else "Loss", "Goals Scored": 1 if team == "A" else 0,
+         "Assists": 0, "Own Goals": 0}
+        for m in match_ids for player, team in (("Ada", "A"), ("Bea", "B"))
+    ])
+
+
+class Crash(Exception):
+    pass
+
+
+class CrashingBackend(SqlBackend):
+    """Fails after inserting the rows, before the fingerprints are written."""
+
+    def _add(self, lineups_df, matches_df):
+        super()._add(lineups_df, matches_df)
+        raise Crash
+
+
+def row_count(backend):
+    return int(backend.query("SELECT COUNT(*) AS n FROM lineups")["n"].iloc[0])
+
+
+def test_rows_and_fingerprints_are_committed_together(tmp_path):
+    db = str(tmp_path / "calciatori.sqlite")
+    SqlBackend(db).update(lineups(1, 2)).close()
+
+    crashing = CrashingBackend(db)
+    with pytest.raises(Crash):
+        crashing.update(lineups(1, 2, 3))
+    assert row_count(crashing) == 4
+    crashing.close()
+
+    # A restart resumes from the committed rows: match 3 is inserted once.
+    backend = SqlBackend(db).update(lineups(1, 2, 3))
+    assert row_count(backend) == 6
+    assert backend.players_table().set_index("Player Name")["Match Played"].to_dict() == {"Ada": 3, "Bea": 3}
@@ -0,0 +1,62 @@
+import pytest
+
+from calciatori import entries
+
+
+def entry(match_id, mvp="Musta"):
+    return {
+        "match_id": match_id, "date": "2026-08-20", "score_a": 2, "score_b": 1, "mvp": mvp,
+        "players": [
+            {"name": "Musta", "team": "A", "goals": 2, "assists": 0, "own_goals": 0},
+            {"name": "Gioele", "team": "B", "goals": 1, "assists": 0, "own_goals": 0},
+        ],
+    }
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    return str(tmp_path / "CALCIATORI_RDG.xlsx")
+
+
+def test_entries_are_appended_and_compacted(workbook):
+    entries.add_match(workbook, entry(51))
+    entries.add_match(workbook, entry(52))
+    lineups, matches = entries.load_entries(workbook)
+    assert matches["Match ID"].tolist() == [51, 52]
+    assert len(lineups) == 4
+    with pytest.raises(ValueError, match="already exists"):
+        entries.add_match(workbook, entry(52))
+
+
+def test_hand_edited_log_is_parsed_again(workbook):
+    entries.add_match(workbook, entry(51, mvp="Musta"))
+    entries.load_entries(workbook)
+    log = entries.entries_path(workbook)
+    with open(log, encoding="utf-8") as f:
+        text = f.read()
+    # Same size, so only the content tells the compacted copy is stale.
+    with open(log, "w", encoding="utf-8") as f:
+        f.write(text.replace('"mvp": "Musta"', '"mvp": "Mustt"'))
+    assert entries.load_entries(workbook)[1]["MVP"].tolist() == ["Mustt"]
+
+
+def test_invalid_line_names_the_line(workbook):
+    entries.add_match(workbook, entry(51))
+    with open(entries.entries_path(workbook), "a", encoding="utf-8") as f:
+        f.write('{"match_id": 52, "date": "2026-08-27"\n')
+    with pytest.raises(entries.EntriesError, match="line 2"):
+        entries.load_entries(workbook)
+
+
+def test_removed_match_can_be_entered_again(workbook):
+    entries.add_match(workbook, entry(51))
+    entries.add_match(workbook, entry(52))
+    entries.load_entries(workbook)
+    entries.remove_match(workbook, 51)
+    assert entries.load_entries(workbook)[1]["Match ID"].tolist() == [52]
+    entries.add_match(workbook, entry(51, mvp="Gioele"))
+    matches = entries.load_entries(workbook)[1]
+    assert matches["Match ID"].tolist() == [52, 51]
+    assert matches["MVP"].tolist() == ["Musta", "Gioele"]
+    with pytest.raises(ValueError, match="not entered in the app"):
+        entries.remove_match(workbook, 50)
@@ -0,0 +1,63 @@
+import pandas as pd
+import pandas.testing as tm
+
+from calciatori.stats import ProgressionAggregator, progression_table
+
+
+def lineups(*matches):
+    """Team Lineups rows for (Match ID, date, {player: goals}) tuples."""
+    rows = []
+    for match_id, date, goals in matches:
+        for i, (player, scored) in enumerate(goals.items()):
+            rows.append({
+                "Match ID": match_id,
+                "Date": pd.Timestamp(date),
+                "Player Name": player,
+                "Team (A/B)": "A" if i % 2 == 0 else "B",
+                "Team Score": 1,
+                "Team Conceded": 0,
+                "Result": "Win" if i % 2 == 0 else "Loss",
+                "Goals Scored": scored,
+                "Assists": None,
+                "Own Goals": None,
+            })
+    return pd.DataFrame(rows)
+
+
+def incremental(*steps):
+    """Progression table after updating one aggregator with each lineups step."""
+    aggregator = ProgressionAggregator()
+    for step in steps:
+        aggregator.update(step)
+    return aggregator.table()
+
+
+def full(df):
+    return progression_table(df).sort_values(
+        ["Player Name", "Date", "Match ID"], kind="stable", ignore_index=True
+    )
+
+
+BASE = lineups(
+    (1, "2025-11-13", {"Ada": 1, "Bea": 0}),
+    (2, "2025-11-20", {"Ada": 2, "Bea": 1}),
+)
+
+
+def test_appended_match_matches_full_table():
+    later = pd.concat([BASE, lineups((3, "2025-11-27", {"Ada": 0, "Bea": 3}))], ignore_index=True)
+    tm.assert_frame_equal(incremental(BASE, later), full(later))
+
+
+def test_match_dated_before_processed_ones_is_not_appended():
+    # A higher Match ID entered late, dated before the matches already seen.
+    late = pd.concat([BASE, lineups((3, "2025-11-01", {"Ada": 1, "Bea": 0}))], ignore_index=True)
+    table = incremental(BASE, late)
+    tm.assert_frame_equal(table, full(late))
+    first = table[table["Player Name"] == "Ada"].iloc[0]
+    assert (first["Match ID"], first["Match Played"], first["Cumulative Goal Scored"]) == (3, 1, 1)
+
+
+def test_lower_match_id_is_not_appended():
+    tail = lineups((2, "2025-11-20", {"Ada": 2, "Bea": 1}))
+    tm.assert_frame_equal(incremental(tail, BASE), full(BASE))
@@ -0,0 +1,38 @@
+from functools import reduce
+
+import pandas as pd
+
+from calciatori.stats import COUNT_COLUMNS, PlayerAggregator, players_table
+
+
+def season(first_id, results):
+    """Team Lineups rows of one season, one match per (winner, loser) pair."""
+    rows = []
+    for match_id, (winner, loser) in enumerate(results, start=first_id):
+        for player, team, result in ((winner, "A", "Win"), (loser, "B", "Loss")):
+            rows.append({
+                "Match ID": match_id, "Date": pd.Timestamp("2025-11-13") + pd.Timedelta(weeks=match_id),
+                "Player Name": player, "Team (A/B)": team, "Team Score": 1 if result == "Win" else 0,
+                "Team Conceded": 0 if result == "Win" else 1, "Result": result,
+                "Goals Scored": 1 if result == "Win" else 0, "Assists": 0, "Own Goals": 0,
+            })
+    return pd.DataFrame(rows)
+
+
+def test_all_time_table_has_one_row_per_player_with_summed_totals():
+    seasons = [
+        (season(1, [("Ada", "Bea"), ("Bea", "Cal")]), ["Ada", "Bea", "Cal", "Dan"]),
+        (season(1, [("Ada", "Cal"), ("Ada", "Bea")]), ["Ada ", "Bea", "Bea", "Cal"]),
+    ]
+    totals = [PlayerAggregator().update(lineups).current_totals() for lineups, _ in seasons]
+    summed = reduce(lambda a, b: a.add(b, fill_value=0), totals)
+    roster = pd.concat([pd.Series(r, dtype=object) for _, r in seasons]).drop_duplicates()
+
+    table = players_table(summed, roster)
+
+    assert table["Player Name"].is_unique
+    assert sorted(table["Player Name"]) == ["Ada", "Bea", "Cal", "Dan"]
+    played = summed[summed["Match Played"] > 0][COUNT_COLUMNS]
+    assert table.set_index("Player Name").loc[played.index, COUNT_COLUMNS].eq(played).all().all()
+    assert table.set_index("Player Name").loc["Ada", "Games Won"] == 3
+    assert table.set_index("Player Name").loc["Dan", "Match Played"] == 0